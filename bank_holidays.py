@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+import instrumentation
+
+FEED_URL = "https://www.gov.uk/bank-holidays.json"
+CACHE_VERSION = 1
+CACHE_TTL = 24 * 60 * 60       # seconds before the cached feed is revalidated
+RETRY_INTERVAL = 5 * 60        # seconds to stay on fallback data after a failed fetch
+REQUEST_TIMEOUT = 10
+
+
+class BankHolidayError(Exception):
+    pass
+
+
+def resource_path(*parts):
+    # PyInstaller unpacks bundled data files under sys._MEIPASS
+    base = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base, *parts)
+
+
+def default_cache_dir():
+    override = os.environ.get("LEAVE_CALC_CACHE_DIR")
+    if override:
+        return override
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "AnnualLeaveCalculator", "Cache")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "annual_leave_calculator")
+
+
+def cache_filename(url):
+    # Any other feed (a local stub, say) gets its own file, so it never
+    # replaces the cached gov.uk data that other runs read
+    if url == FEED_URL:
+        return f"bank-holidays.v{CACHE_VERSION}.json"
+    digest = hashlib.sha256(url.encode("utf-8")).hexdigest()[:12]
+    return f"bank-holidays.v{CACHE_VERSION}.{digest}.json"
+
+
+class BankHolidayIndex:
+    # Built once per feed load: (region, year) -> sorted dates, so lookups
+    # never re-parse the feed. version identifies the exact feed contents.
+    def __init__(self, data):
+        self.version = hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        self.by_region = {}
+        self.by_year = {}
+        for region, division in data.items():
+            dates = sorted(date.fromisoformat(e["date"]) for e in division.get("events", []))
+            self.by_region[region] = dates
+            for d in dates:
+                self.by_year.setdefault((region, d.year), []).append(d)
+        self.counts = {key: len(dates) for key, dates in self.by_year.items()}
+
+    def regions(self):
+        return list(self.by_region)
+
+    def dates(self, year, region="england-and-wales"):
+        return self.by_year.get((region, year), [])
+
+    def count(self, year, region="england-and-wales"):
+        return self.counts.get((region, year), 0)
+
+    def between(self, start_date, end_date, region="england-and-wales"):
+        dates = self.by_region.get(region, [])
+        lo = bisect_left(dates, _as_date(start_date))
+        hi = bisect_right(dates, _as_date(end_date))
+        return dates[lo:hi]
+
+    def count_between(self, start_date, end_date, region="england-and-wales"):
+        dates = self.by_region.get(region, [])
+        return bisect_right(dates, _as_date(end_date)) - bisect_left(dates, _as_date(start_date))
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+class _Flight:
+    # One in-progress refresh, shared by every caller that asked for it
+    def __init__(self):
+        self.done = threading.Event()
+        self.data = None
+        self.error = None
+
+    def result(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.data
+
+
+class BankHolidayStore:
+    def __init__(self, url=FEED_URL, cache_dir=None, ttl=CACHE_TTL,
+                 snapshot_path=None, retry_interval=RETRY_INTERVAL, session=None):
+        self.url = url
+        self.session = session   # requests.Session, created on first fetch and reused
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.snapshot_path = snapshot_path or resource_path("data", "bank-holidays.json")
+        self.cache_path = os.path.join(self.cache_dir, cache_filename(url))
+        self._entry = None       # {"data", "fetched_at", "etag", "last_modified", "source"}
+        self._valid_until = 0.0
+        self._index = None
+        self._index_data = None
+        self._lock = threading.Lock()
+        self._flight = None      # the refresh in progress, if any
+        self._index_lock = threading.Lock()
+
+    @property
+    def source(self):
+        return self._entry["source"] if self._entry else None
+
+    def load(self):
+        if self._entry is not None and time.time() < self._valid_until:
+            instrumentation.count("bank_holidays.memory_hits")
+            return self._entry["data"]
+
+        # Single flight: the first caller to find the cache cold or stale
+        # refreshes it; callers arriving meanwhile wait for that same refresh
+        # and get its data or its exception.
+        with self._lock:
+            flight = self._flight
+            leader = flight is None
+            if leader:
+                flight = self._flight = _Flight()
+        if not leader:
+            instrumentation.count("bank_holidays.coalesced")
+            return flight.result()
+        try:
+            flight.data = self._refresh()
+        except BaseException as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                self._flight = None
+            flight.done.set()
+        return flight.result()
+
+    def _refresh(self):
+        now = time.time()
+        if self._entry is not None and now < self._valid_until:
+            return self._entry["data"]   # refreshed by the flight we just missed
+
+        if self._entry is None:
+            self._entry = self._read_cache()
+        if self._entry is not None and now - self._entry["fetched_at"] < self.ttl:
+            instrumentation.count("bank_holidays.disk_hits")
+            self._valid_until = self._entry["fetched_at"] + self.ttl
+            return self._entry["data"]
+
+        try:
+            self._entry = self._fetch(self._entry)
+            self._write_cache(self._entry)
+            self._valid_until = self._entry["fetched_at"] + self.ttl
+        except Exception as e:
+            if self._entry is None:
+                self._entry = self._read_snapshot()
+                instrumentation.count("bank_holidays.snapshot_fallbacks")
+            if self._entry is None:
+                raise BankHolidayError(f"Bank holidays unavailable: {e}") from e
+            self._valid_until = now + self.retry_interval
+        return self._entry["data"]
+
+    def index(self):
+        data = self.load()
+        if data is not self._index_data:
+            with self._index_lock:
+                if data is not self._index_data:
+                    with instrumentation.span("fetch.index"):
+                        self._index = BankHolidayIndex(data)
+                    self._index_data = data
+        return self._index
+
+    def count(self, year, region="england-and-wales"):
+        return self.index().count(year, region)
+
+    def count_between(self, start_date, end_date, region="england-and-wales"):
+        return self.index().count_between(start_date, end_date, region)
+
+    def _fetch(self, previous):
+        import requests  # deferred: only needed when the cache is cold or stale
+
+        headers = {}
+        if previous is not None and previous["source"] == "network":
+            if previous.get("etag"):
+                headers["If-None-Match"] = previous["etag"]
+            if previous.get("last_modified"):
+                headers["If-Modified-Since"] = previous["last_modified"]
+
+        instrumentation.count("bank_holidays.http_calls")
+        with instrumentation.span("fetch"):
+            if self.session is None:
+                self.session = requests.Session()
+            response = self.session.get(self.url, headers=headers, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 304 and previous is not None:
+            return dict(previous, fetched_at=time.time())
+        response.raise_for_status()
+        return {
+            "data": response.json(),
+            "fetched_at": time.time(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "source": "network",
+        }
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("version") != CACHE_VERSION or not isinstance(entry.get("data"), dict):
+            return None
+        entry.pop("version")
+        return entry
+
+    def _write_cache(self, entry):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(dict(entry, version=CACHE_VERSION), f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass  # a read-only profile just means we refetch next session
+
+    def _read_snapshot(self):
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return {"data": data, "fetched_at": 0.0, "etag": None,
+                "last_modified": None, "source": "snapshot"}
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def default_store():
+    # One store per process, so every caller shares its single-flight refresh
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = BankHolidayStore()
+        return _default_store
@@ -0,0 +1,516 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import deque
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import numpy as np
+import instrumentation
+from calculations import (
+    calculate_entitlements_timeline,
+    calculate_long_service_timeline,
+    get_bank_holiday_index,
+    hours_segments
+)
+from cohorts import LongServiceTable, record_stats, reuse_summary
+import leave_calendar
+from kernels import calculate_entitlements_array, long_service_award_array
+from logic import LeaveResult
+from result_store import ResultStore, decode_result, input_hash
+from snapshots import SnapshotWriter
+from validation import employee_number, validate_rows
+from writers import (
+    BLOCK_ROWS,
+    QUEUE_DEPTH,
+    SHARD_SIZE,
+    CsvResultWriter,
+    FanOutWriter,
+    JsonResultWriter,
+    PdfProcessWriter,
+    PdfStatementWriter,
+    ShardedPdfWriter,
+    open_optima_writer,
+    open_writer
+)
+
+# Accepted spellings for each input column (headers are lower-cased and
+# spaces/hyphens turned into underscores before matching).
+INPUT_COLUMNS = {
+    "employee": ("employee", "employee_number", "emp_number", "employee_no"),
+    "hire_date": ("hire_date", "start_of_service", "service_date"),
+    "contracted_hours": ("contracted_hours", "contracted_weekly_hours", "hours"),
+    "region": ("region", "bank_holiday_region"),
+    "start_date": ("start_date", "leave_start", "leave_period_start"),
+    "end_date": ("end_date", "leave_end", "leave_period_end"),
+    "leave_year": ("leave_year", "year"),
+    "hours_changes": ("hours_changes", "contract_changes", "hours_timeline"),
+}
+
+# ~5k rows keeps each task at a few hundred ms of parsing and kernel work,
+# against a few ms to pickle the chunk to a worker and the results back.
+CHUNK_SIZE = 5000
+
+
+def _header_map(header):
+    lookup = {alias: field for field, aliases in INPUT_COLUMNS.items() for alias in aliases}
+    mapping = {}
+    for position, name in enumerate(header):
+        key = str(name or "").strip().lower().replace(" ", "_").replace("-", "_")
+        if key in lookup:
+            mapping[lookup[key]] = position
+    missing = [f for f in ("employee", "hire_date") if f not in mapping]
+    if missing:
+        raise ValueError(f"Input is missing required column(s): {', '.join(missing)}")
+    return mapping
+
+
+def _iter_table(rows):
+    rows = iter(rows)
+    mapping = _header_map(next(rows, []))
+    for values in rows:
+        if not any(v not in (None, "") for v in values):
+            continue
+        yield {field: values[pos] if pos < len(values) else None for field, pos in mapping.items()}
+
+
+def read_rows(path):
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook  # only needed for Excel input
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            yield from _iter_table(workbook.active.iter_rows(values_only=True))
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from _iter_table(csv.reader(f))
+
+
+def parse_row(row):
+    inputs, _, errors = validate_rows([row])
+    if errors:
+        _, field, reason = errors[0]
+        raise ValueError(f"{field}: {reason}")
+    return inputs[0]
+
+
+def calculate_chunk(inputs, holidays, long_service=None):
+    # Same values as logic.compute_leave, computed a column at a time.
+    # long_service: a LongServiceTable shared by the chunks of one run.
+    if long_service is None:
+        long_service = LongServiceTable()
+    count = len(inputs)
+    hours = np.empty(count)
+    hire_days = np.empty(count, dtype=np.int64)
+    start_days = np.empty(count, dtype=np.int64)
+    end_days = np.empty(count, dtype=np.int64)
+    days_in_year = np.empty(count, dtype=np.int64)
+    bank_holidays = np.empty(count, dtype=np.int64)
+    for i, row in enumerate(inputs):
+        leave_year = row["end_date"].year
+        hours[i] = row["contracted_hours"]
+        hire_days[i] = row["hire_date"].toordinal()
+        start_days[i] = row["start_date"].toordinal()
+        end_days[i] = row["end_date"].toordinal()
+        days_in_year[i] = leave_calendar.days_in_year(leave_year)
+        bank_holidays[i] = holidays.count(leave_year, row["region"])
+    leave_days = end_days - start_days + 1
+    days_employed = end_days - hire_days
+
+    prorated, base, bh = calculate_entitlements_array(hours, leave_days, days_in_year, bank_holidays)
+    years_employed, blocks = long_service.lookup(hire_days, end_days)
+    award = long_service_award_array(hours, blocks, leave_days, days_in_year)
+
+    # Employees whose hours changed during the period are prorated piecewise,
+    # O(segments) each; everyone else keeps the vectorised values.
+    for i, row in enumerate(inputs):
+        if row["hours_changes"]:
+            timeline = ((row["start_date"], row["contracted_hours"]),) + row["hours_changes"]
+            segments = hours_segments(timeline, row["start_date"], row["end_date"])
+            prorated[i], base[i], bh[i] = calculate_entitlements_timeline(
+                segments, int(days_in_year[i]), int(bank_holidays[i]))
+            award[i], _ = calculate_long_service_timeline(
+                segments, float(years_employed[i]), int(days_in_year[i]))
+    total = prorated + award
+
+    results = []
+    for i, row in enumerate(inputs):
+        results.append(LeaveResult(
+            emp_number=row["emp_number"],
+            hire_date=row["hire_date"],
+            start_date=row["start_date"],
+            end_date=row["end_date"],
+            region=row["region"],
+            leave_year=row["end_date"].year,
+            contracted_hours=row["contracted_hours"],
+            days_employed=int(days_employed[i]),
+            years_employed=float(years_employed[i]),
+            leave_days=int(leave_days[i]),
+            bank_holiday_count=int(bank_holidays[i]),
+            prorated_entitlement=float(prorated[i]),
+            prorated_base=float(base[i]),
+            prorated_bh=float(bh[i]),
+            long_service_award=float(award[i]),
+            long_service_blocks=int(blocks[i]),
+            total_entitlement=float(total[i]),
+            hours_changes=row["hours_changes"],
+        ))
+    return results
+
+
+def process_chunk(rows, first_line, holidays, long_service=None):
+    # -> (results for the valid rows, errors for the rejected ones)
+    inputs, _, errors = validate_rows(rows, first_line)
+    return calculate_chunk(inputs, holidays, long_service), errors
+
+
+def _timed_chunk(rows, first_line, holidays, long_service):
+    start = time.perf_counter()
+    results, errors = process_chunk(rows, first_line, holidays, long_service)
+    return results, errors, time.perf_counter() - start, long_service.take_stats()
+
+
+def _reject(errors, rejected):
+    # With no list to collect them in, the first bad row stops the run
+    if errors and rejected is None:
+        line, field, reason = errors[0]
+        raise ValueError(f"Row {line}: {field}: {reason}")
+    if errors:
+        rejected.extend(errors)
+        instrumentation.count("rows_rejected", len({line for line, _, _ in errors}))
+
+
+def _account(results, errors, seconds, stats, latency, rejected):
+    # Worker processes time their own chunks; the totals are recorded here
+    _reject(errors, rejected)
+    instrumentation.record("compute", seconds)
+    record_stats(stats)
+    instrumentation.count("rows", len(results))
+    if latency is not None:
+        latency.add(seconds, len(results))
+    return results
+
+
+_worker_holidays = None
+_worker_long_service = None
+
+
+def _init_worker(holidays):
+    # Each worker receives the read-only bank holiday index once, at start-up,
+    # and fills its own long service table over the run
+    global _worker_holidays, _worker_long_service
+    _worker_holidays = holidays
+    _worker_long_service = LongServiceTable()
+
+
+def _process_chunk_in_worker(rows, first_line):
+    return _timed_chunk(rows, first_line, _worker_holidays, _worker_long_service)
+
+
+def _chunks(rows, chunk_size):
+    rows = iter(rows)
+    first_line = 2
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk, first_line
+        first_line += len(chunk)
+
+
+def calculate_batch(rows, holidays=None, chunk_size=CHUNK_SIZE, workers=1, latency=None,
+                    rejected=None):
+    # Bank holidays are resolved once for the whole run; rows are consumed
+    # a chunk at a time so memory does not grow with the size of the input.
+    # Invalid rows are skipped and appended to rejected as (line, field,
+    # reason); with rejected=None the first one raises ValueError.
+    if holidays is None:
+        holidays = get_bank_holiday_index()
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        long_service = LongServiceTable()
+        for chunk, first_line in _chunks(rows, chunk_size):
+            yield from _account(*_timed_chunk(chunk, first_line, holidays, long_service), latency, rejected)
+        return
+
+    # Only a couple of chunks per worker are in flight at once, and they are
+    # yielded in submission order, so output keeps input order.
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(holidays,)) as executor:
+        pending = deque()
+        for chunk, first_line in _chunks(rows, chunk_size):
+            pending.append(executor.submit(_process_chunk_in_worker, chunk, first_line))
+            if len(pending) >= workers * 2:
+                yield from _account(*pending.popleft().result(), latency, rejected)
+        while pending:
+            yield from _account(*pending.popleft().result(), latency, rejected)
+
+
+def calculate_incremental(rows, store, holidays=None, chunk_size=CHUNK_SIZE, unchanged=True,
+                          latency=None, rejected=None, missing=None, prune=False):
+    # Yields (result, changed) in input order. Rows whose input hash and bank
+    # holiday data version match the store reuse the stored result; only the
+    # dirty rows are recalculated and saved back. With unchanged=False only
+    # the recalculated rows are yielded and stored results are never decoded.
+    # The store holds one result per (employee, leave year), so a repeat of
+    # one in the input is rejected like an invalid row. Once the input is
+    # exhausted, the keys of stored results for its leave years that it no
+    # longer lists (and that had no invalid row) are appended to missing, if
+    # given; prune=True also deletes them from the store. A partial input
+    # would otherwise wipe every employee it leaves out.
+    if holidays is None:
+        holidays = get_bank_holiday_index()
+    long_service = LongServiceTable()
+    seen = {}   # (employee, leave_year) -> input line
+    skipped = set()   # employees with an invalid row, never treated as missing
+    for chunk, first_line in _chunks(rows, chunk_size):
+        start = time.perf_counter()
+        inputs, valid, errors = validate_rows(chunk, first_line)
+        lines = (first_line + np.flatnonzero(valid)).tolist()
+        unique = []
+        for line, row in zip(lines, inputs):
+            key = (row["emp_number"], row["end_date"].year)
+            if key in seen:
+                errors.append((line, "employee", f"Duplicate of row {seen[key]} (same employee and leave year)"))
+            else:
+                seen[key] = line
+                unique.append(row)
+        inputs = unique
+        errors.sort(key=lambda error: error[0])
+        skipped.update(employee_number(chunk[line - first_line].get("employee")) for line, _, _ in errors)
+        _reject(errors, rejected)
+        digests = [input_hash(row) for row in inputs]
+        with instrumentation.span("store.lookup"):
+            stored = store.lookup((row["emp_number"], row["end_date"].year) for row in inputs)
+
+        dirty = []
+        for i, row in enumerate(inputs):
+            previous = stored.get((row["emp_number"], row["end_date"].year))
+            if previous is None or previous[:2] != (digests[i], holidays.version):
+                dirty.append(i)
+        fresh = {}
+        if dirty:
+            with instrumentation.span("compute"):
+                fresh = dict(zip(dirty, calculate_chunk([inputs[i] for i in dirty], holidays, long_service)))
+            with instrumentation.span("store.save"):
+                store.save((digests[i], holidays.version, result) for i, result in fresh.items())
+        instrumentation.count("rows", len(inputs))
+        instrumentation.count("rows_recalculated", len(fresh))
+        record_stats(long_service.take_stats())
+        if latency is not None:
+            latency.add(time.perf_counter() - start, len(inputs))
+
+        for i, row in enumerate(inputs):
+            if i in fresh:
+                yield fresh[i], True
+            elif unchanged:
+                yield decode_result(stored[(row["emp_number"], row["end_date"].year)][2]), False
+
+    with instrumentation.span("store.lookup"):
+        gone = store.missing(seen, {year for _, year in seen}, skipped)
+    instrumentation.count("rows_missing", len(gone))
+    if prune:
+        with instrumentation.span("store.save"):
+            store.remove(gone)
+    if missing is not None:
+        missing.extend(gone)
+
+
+def _record_changes(pairs, delta, counts):
+    for result, changed in pairs:
+        if changed:
+            counts["changed"] += 1
+            if delta is not None:
+                delta.write(result)
+        yield result
+
+
+def write_missing_report(path, missing):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["employee", "leave_year"])
+        writer.writerows(missing)
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return value
+
+
+def non_negative_int(text):
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, not {value}")
+    return value
+
+
+def write_error_report(path, errors):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["row", "field", "reason"])
+        writer.writerows(errors)
+
+
+def _run(args, latency, rejected):
+    counts = {"changed": 0}
+    missing = []
+    holidays = get_bank_holiday_index()   # one feed version for the whole run and its snapshot
+    with ExitStack() as stack:
+        if args.store:
+            store = stack.enter_context(ResultStore(args.store))
+            delta = stack.enter_context(open_optima_writer(args.delta)) if args.delta else None
+            # With only a delta requested, unchanged employees are skipped entirely
+            delta_only = delta is not None and not (args.output or args.json or args.pdf or args.snapshot)
+            results = _record_changes(
+                calculate_incremental(read_rows(args.input), store, holidays, chunk_size=args.chunk_size,
+                                      unchanged=not delta_only, latency=latency,
+                                      rejected=rejected, missing=missing, prune=args.prune),
+                delta, counts)
+        else:
+            results = calculate_batch(read_rows(args.input), holidays, chunk_size=args.chunk_size,
+                                      workers=args.workers, latency=latency, rejected=rejected)
+
+        # (writer, summary line) per output; with several outputs each is
+        # written on its own thread, fed through a bounded queue
+        fan_out = args.queue_depth > 0 and sum(map(bool, (args.output, args.json, args.pdf, args.snapshot))) > 1
+        sinks = []
+        if args.output:
+            writer = stack.enter_context(open_writer(args.output, args.format))
+            sinks.append((writer, f"employee(s) to {os.path.abspath(args.output)}"))
+        elif not ((args.store and args.delta) or args.json or args.snapshot):
+            sinks.append((stack.enter_context(CsvResultWriter(sys.stdout)), None))
+        if args.json:
+            writer = stack.enter_context(JsonResultWriter(args.json))
+            sinks.append((writer, f"employee(s) to {os.path.abspath(args.json)}"))
+        if args.pdf and args.pdf_shard_size:
+            writer = stack.enter_context(ShardedPdfWriter(args.pdf, args.pdf_shard_size, args.workers, args.toc))
+            sinks.append((writer, f"statement(s) to {os.path.abspath(args.pdf)}"))
+        elif args.pdf:
+            # Alongside other outputs, the document is laid out in its own process
+            if fan_out:
+                writer = PdfProcessWriter(args.pdf, args.toc, depth=args.queue_depth)
+            else:
+                writer = PdfStatementWriter(args.pdf, args.toc)
+            writer = stack.enter_context(writer)
+            sinks.append((writer, f"statement(s) to {os.path.abspath(args.pdf)}"))
+        if args.snapshot:
+            writer = stack.enter_context(SnapshotWriter(args.snapshot, holidays, args.input))
+            sinks.append((writer, f"employee(s) to snapshot {os.path.abspath(args.snapshot)}"))
+        writers = [writer for writer, _ in sinks]
+        if fan_out:
+            writers = [stack.enter_context(FanOutWriter(writers, args.queue_depth))]
+        for result in results:
+            for writer in writers:
+                writer.write(result)
+    for writer, summary in sinks:
+        if summary:
+            print(f"Wrote {writer.count} {summary}", file=sys.stderr)
+    if args.store:
+        print(f"Recalculated {counts['changed']} employee(s); the rest were unchanged since the last run",
+              file=sys.stderr)
+        if missing:
+            if args.missing:
+                write_missing_report(args.missing, missing)
+            where = f"; see {os.path.abspath(args.missing)}" if args.missing else ""
+            if args.prune:
+                print(f"Removed {len(missing)} employee(s) no longer in the input from the store{where}",
+                      file=sys.stderr)
+            else:
+                print(f"{len(missing)} employee(s) in the store are not in the input; kept them "
+                      f"(--prune removes them){where}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m batch",
+        description="Calculate annual leave entitlements for every employee in a CSV/XLSX file.")
+    parser.add_argument("input", help="employee CSV or XLSX file")
+    parser.add_argument("-o", "--output",
+                        help="output .csv, .json, .parquet or .arrow file (default: CSV to stdout)")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to this JSON file")
+    parser.add_argument("--format", choices=["csv", "json", "parquet", "arrow"],
+                        help="output format (default: from the output file extension)")
+    parser.add_argument("-w", "--workers", type=non_negative_int, default=1,
+                        help="worker processes (0 = one per CPU core, default: 1)")
+    parser.add_argument("--chunk-size", type=positive_int, default=CHUNK_SIZE,
+                        help=f"rows per work unit (default: {CHUNK_SIZE})")
+    parser.add_argument("--pdf", help="also write employee statements to this PDF "
+                                      "(a directory of numbered PDFs with --pdf-shard-size)")
+    parser.add_argument("--pdf-shard-size", type=positive_int,
+                        help=f"employees per statement PDF, e.g. {SHARD_SIZE}; shards are "
+                             "rendered on the --workers process pool")
+    parser.add_argument("--toc", action="store_true", help="add a contents page to statement PDFs")
+    parser.add_argument("--queue-depth", type=int, default=QUEUE_DEPTH,
+                        help=f"with several outputs, blocks of {BLOCK_ROWS} results queued per output "
+                             f"while they are written concurrently (0 = one after another, default: {QUEUE_DEPTH})")
+    parser.add_argument("--store", help="SQLite file of previous results; only employees whose "
+                                        "inputs or bank holidays changed are recalculated")
+    parser.add_argument("--delta", help="with --store, write the Optima upload fields of "
+                                        "changed employees to this CSV")
+    parser.add_argument("--snapshot", metavar="DIR",
+                        help="save the run and the bank holidays it used to this directory, "
+                             "for python -m snapshots")
+    parser.add_argument("--missing", metavar="PATH",
+                        help="with --store, write the employees that are in the store but not in "
+                             "the input (for the same leave years) to this CSV")
+    parser.add_argument("--prune", action="store_true",
+                        help="with --store, delete those employees from the store; only use it "
+                             "when the input lists the whole workforce")
+    parser.add_argument("--errors", metavar="PATH",
+                        help="write rejected rows to this CSV as row, field, reason")
+    parser.add_argument("--strict", action="store_true",
+                        help="stop at the first invalid row instead of skipping it")
+    parser.add_argument("--profile", nargs="?", const="batch.pstats", metavar="PATH",
+                        help="cProfile the run, write pstats to PATH (default: batch.pstats) "
+                             "and print per-stage timings")
+    args = parser.parse_args(argv)
+    if args.delta and not args.store:
+        parser.error("--delta needs --store")
+    if args.missing and not args.store:
+        parser.error("--missing needs --store")
+    if args.prune and not args.store:
+        parser.error("--prune needs --store")
+    if args.store and args.workers != 1:
+        parser.error("--workers is not supported with --store (only changed employees are recalculated)")
+
+    latency = instrumentation.LatencyRecorder()
+    rejected = None if args.strict else []
+    try:
+        if args.profile:
+            with instrumentation.profiled(args.profile):
+                _run(args, latency, rejected)
+        else:
+            _run(args, latency, rejected)
+    except ValueError as e:
+        parser.exit(1, f"error: {e}\n")
+    print(latency.summary(), file=sys.stderr)
+    if args.profile:
+        print(instrumentation.report(), file=sys.stderr)
+        instrumentation.print_profile(args.profile)
+        reuse = reuse_summary()
+        if reuse:
+            print(reuse, file=sys.stderr)
+        print(f"cProfile output written to {os.path.abspath(args.profile)} "
+              f"(view with: python -m pstats {args.profile})", file=sys.stderr)
+    if rejected:
+        rows = len({line for line, _, _ in rejected})
+        if args.errors:
+            write_error_report(args.errors, rejected)
+            print(f"Skipped {rows} invalid row(s); see {os.path.abspath(args.errors)}", file=sys.stderr)
+        else:
+            print(f"Skipped {rows} invalid row(s):", file=sys.stderr)
+            for line, field, reason in rejected[:10]:
+                print(f"  row {line}: {field}: {reason}", file=sys.stderr)
+            if len(rejected) > 10:
+                print(f"  ... and {len(rejected) - 10} more (use --errors to save them all)", file=sys.stderr)
+        parser.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Scaling benchmark for the batch engine's process pool.
+
+  python benchmarks/bench_batch.py [--rows 250000] [--workers 1 2 4 8]
+
+Runs the same synthetic multi-region, multi-year workforce through
+batch.calculate_batch with each worker count and reports rows/s and the
+speedup over a single process.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import CHUNK_SIZE, calculate_batch
+from calculations import REGIONS, get_bank_holiday_index
+
+
+def synthetic_rows(count, seed=7):
+    rng = random.Random(seed)
+    regions = list(REGIONS.values())
+    for i in range(count):
+        year = rng.randint(2022, 2026)
+        hire = date(1985, 1, 1) + timedelta(days=rng.randrange(13500))   # hired by the end of 2021
+        yield {
+            "employee": f"E{i:07d}",
+            "hire_date": hire.isoformat(),
+            "contracted_hours": str(rng.randrange(0, 161) / 4),
+            "region": rng.choice(regions),
+            "start_date": f"{year}-01-01",
+            "end_date": f"{year}-12-31",
+        }
+
+
+def main(argv=None):
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=250_000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, cores} & set(range(1, cores + 1))))
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    holidays = get_bank_holiday_index()
+    print(f"{args.rows} rows, chunk size {args.chunk_size}, {cores} CPU core(s)")
+    print(f"{'workers':>8} {'seconds':>9} {'rows/s':>10} {'speedup':>8}")
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        count = sum(1 for _ in calculate_batch(synthetic_rows(args.rows), holidays,
+                                               chunk_size=args.chunk_size, workers=workers))
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>9.2f} {count / elapsed:>10.0f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
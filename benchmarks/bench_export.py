@@ -0,0 +1,71 @@
+"""Fan-out export benchmark.
+
+  python benchmarks/bench_export.py [--employees 3000] [--queue-depth 8]
+
+Writes the same synthetic workforce to CSV, JSON and a statement PDF, first
+one output at a time and then through writers.FanOutWriter, and compares
+the fan-out wall time with the slowest single output and with their sum.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import calculate_batch
+from bench_batch import synthetic_rows
+from writers import (
+    QUEUE_DEPTH,
+    CsvResultWriter,
+    FanOutWriter,
+    JsonResultWriter,
+    PdfProcessWriter,
+    PdfStatementWriter
+)
+
+
+def timed_write(writers, results, depth=0):
+    start = time.perf_counter()
+    targets = [FanOutWriter(writers, depth)] if depth else writers
+    for result in results:
+        for target in targets:
+            target.write(result)
+    for target in targets:
+        target.close()
+    if depth:
+        for writer in writers:
+            writer.close()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=3000)
+    parser.add_argument("--queue-depth", type=int, default=QUEUE_DEPTH)
+    args = parser.parse_args(argv)
+
+    warnings.simplefilter("ignore", DeprecationWarning)  # fpdf2 txt=/ln= notices
+    results = list(calculate_batch(synthetic_rows(args.employees)))
+    with tempfile.TemporaryDirectory() as out:
+        sinks = {
+            "csv": lambda: CsvResultWriter(os.path.join(out, "results.csv")),
+            "json": lambda: JsonResultWriter(os.path.join(out, "results.json")),
+            "pdf": lambda: PdfStatementWriter(os.path.join(out, "statements.pdf")),
+        }
+        times = {}
+        for name, make in sinks.items():
+            times[name] = timed_write([make()], results)
+            print(f"{name:<8}: {times[name]:7.2f}s")
+        print(f"sum     : {sum(times.values()):7.2f}s")
+        print(f"slowest : {max(times.values()):7.2f}s")
+        writers = [sinks["csv"](), sinks["json"](),
+                   PdfProcessWriter(os.path.join(out, "statements.pdf"), depth=args.queue_depth)]
+        elapsed = timed_write(writers, results, args.queue_depth)
+        print(f"fan-out : {elapsed:7.2f}s ({os.cpu_count()} CPU core(s))")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Differential check and benchmark for the NumPy entitlement kernels.
+
+  python benchmarks/bench_kernels.py [--sizes 10000 100000 1000000]
+
+Every size is first checked element-by-element against the scalar
+calculations functions (bit-identical floats), then both paths are timed.
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calculations import calculate_entitlements, calculate_long_service
+from kernels import calculate_entitlements_array, calculate_long_service_array
+
+
+def random_inputs(size, seed):
+    rng = np.random.default_rng(seed)
+    days_in_year = rng.choice([365, 366], size)
+    return {
+        "hours": rng.integers(0, 161, size) / 4,
+        "leave_days": rng.integers(1, days_in_year + 1),
+        "days_in_year": days_in_year,
+        "bank_holidays": rng.integers(7, 13, size),
+        "years": rng.integers(-30, 45 * 366, size) / 365.25,
+    }
+
+
+def scalar(inputs):
+    rows = zip(inputs["hours"].tolist(), inputs["leave_days"].tolist(), inputs["days_in_year"].tolist(),
+               inputs["bank_holidays"].tolist(), inputs["years"].tolist())
+    out = []
+    for hours, leave_days, days_in_year, bank_holidays, years in rows:
+        prorated, base, bh = calculate_entitlements(hours, leave_days, days_in_year, bank_holidays)
+        award, _ = calculate_long_service(hours, years, leave_days, days_in_year)
+        out.append((prorated, base, bh, award))
+    return np.array(out, dtype=np.float64).T
+
+
+def vector(inputs):
+    prorated, base, bh = calculate_entitlements_array(
+        inputs["hours"], inputs["leave_days"], inputs["days_in_year"], inputs["bank_holidays"])
+    award, _ = calculate_long_service_array(
+        inputs["hours"], inputs["years"], inputs["leave_days"], inputs["days_in_year"])
+    return np.array([prorated, base, bh, award])
+
+
+def check_identical(expected, actual):
+    for name, e, a in zip(("prorated", "base", "bank holiday", "long service"), expected, actual):
+        mismatches = np.flatnonzero(e.view(np.int64) != a.view(np.int64))
+        if mismatches.size:
+            i = mismatches[0]
+            raise AssertionError(f"{name} differs at row {i}: scalar={e[i]!r} vector={a[i]!r}")
+
+
+def timed(fn, inputs):
+    start = time.perf_counter()
+    result = fn(inputs)
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--seed", type=int, default=2024)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>10} {'scalar s':>10} {'vector s':>10} {'speedup':>8}")
+    for size in args.sizes:
+        inputs = random_inputs(size, args.seed + size)
+        expected, scalar_time = timed(scalar, inputs)
+        actual, vector_time = timed(vector, inputs)
+        check_identical(expected, actual)
+        print(f"{size:>10} {scalar_time:>10.3f} {vector_time:>10.4f} {scalar_time / vector_time:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
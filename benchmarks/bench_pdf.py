@@ -0,0 +1,49 @@
+"""Pages-per-second benchmark for bulk PDF statements.
+
+  python benchmarks/bench_pdf.py [--employees 3000] [--workers 1 4] [--shard-size 500]
+
+Renders the same synthetic workforce as one document and as sharded
+documents on 1..N worker processes.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import calculate_batch
+from bench_batch import synthetic_rows
+from writers import SHARD_SIZE, PdfStatementWriter, ShardedPdfWriter
+
+
+def timed_write(writer, results):
+    start = time.perf_counter()
+    with writer:
+        for result in results:
+            writer.write(result)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=3000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    args = parser.parse_args(argv)
+
+    warnings.simplefilter("ignore", DeprecationWarning)  # fpdf2 txt=/ln= notices
+    results = list(calculate_batch(synthetic_rows(args.employees)))
+    with tempfile.TemporaryDirectory() as out:
+        elapsed = timed_write(PdfStatementWriter(os.path.join(out, "all.pdf")), results)
+        print(f"single document : {elapsed:7.2f}s {len(results) / elapsed:8.0f} pages/s")
+        for workers in sorted(set(args.workers)):
+            writer = ShardedPdfWriter(os.path.join(out, f"shards-{workers}"), args.shard_size, workers)
+            elapsed = timed_write(writer, results)
+            print(f"{workers:2d} worker shards: {elapsed:7.2f}s {len(results) / elapsed:8.0f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Requests-per-second benchmark for the local JSON service.
+
+  python benchmarks/bench_service.py [--requests 2000] [--clients 16] [--bulk 500]
+
+Starts the service on a free port against a cold bank holiday cache and a
+local stand-in for the gov.uk feed, fires single-employee requests from
+--clients threads at once, then times one bulk request. Also reports how
+many times the feed was downloaded (should be 1).
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from queue import Queue
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank_holidays import BankHolidayStore
+from run import FixtureHandler, start_fixture_server
+from service import make_service
+
+EMPLOYEE = {"employee": "E0000001", "hire_date": "2012-06-04", "leave_year": 2025,
+            "contracted_hours": "30", "region": "England & Wales"}
+
+feed_downloads = []
+
+
+class CountingFixtureHandler(FixtureHandler):
+    def do_GET(self):
+        feed_downloads.append(time.time())
+        super().do_GET()
+
+
+def post(port, path, body):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    connection.request("POST", path, json.dumps(body), {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    payload = response.read()
+    connection.close()
+    return response.status, json.loads(payload)
+
+
+def client(port, jobs, failures):
+    while True:
+        i = jobs.get()
+        if i is None:
+            return
+        status, _ = post(port, "/calculate", dict(EMPLOYEE, employee=f"E{i:07d}"))
+        if status != 200:
+            failures.append(status)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--bulk", type=int, default=500, help="employees in the bulk request")
+    args = parser.parse_args(argv)
+
+    fixture, feed_url = start_fixture_server()
+    fixture.RequestHandlerClass = CountingFixtureHandler
+    with tempfile.TemporaryDirectory() as cache_dir:
+        store = BankHolidayStore(url=feed_url, cache_dir=cache_dir)
+        server = make_service(port=0, store=store)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_port
+
+        jobs, failures = Queue(), []
+        for i in range(args.requests):
+            jobs.put(i)
+        threads = [threading.Thread(target=client, args=(port, jobs, failures))
+                   for _ in range(args.clients)]
+        for _ in threads:
+            jobs.put(None)
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        print(f"single : {args.requests} request(s) from {args.clients} client(s) in {elapsed:.2f}s "
+              f"({args.requests / elapsed:,.0f} req/s), {len(failures)} failure(s)")
+
+        employees = [dict(EMPLOYEE, employee=f"E{i:07d}") for i in range(args.bulk)]
+        start = time.perf_counter()
+        status, body = post(port, "/calculate/bulk", {"employees": employees})
+        elapsed = time.perf_counter() - start
+        print(f"bulk   : {len(body.get('results', []))} employee(s) in {elapsed * 1000:.1f} ms "
+              f"(status {status})")
+        print(f"gov.uk feed downloads: {len(feed_downloads)}")
+        server.shutdown()
+        server.server_close()
+    fixture.shutdown()
+
+
+if __name__ == "__main__":
+    main()
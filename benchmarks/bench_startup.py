@@ -0,0 +1,59 @@
+"""Time-to-first-window benchmark for the desktop app.
+
+  python benchmarks/bench_startup.py [--exe dist/main.exe] [--runs 5]
+                                     [--save startup.json] [--baseline startup.json]
+
+Starts the app with LEAVE_CALC_STARTUP_PROBE set, which makes gui.build_gui
+close the window as soon as the first frame has been drawn, and records the
+wall time of each launch. With --baseline the run fails (exit code 1) if the
+median is more than --max-regression slower than the stored median.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def launch_time(command):
+    env = dict(os.environ, LEAVE_CALC_STARTUP_PROBE="1")
+    start = time.perf_counter()
+    subprocess.run(command, cwd=ROOT, env=env, check=True, timeout=120)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exe", help="PyInstaller build to time (default: python main.py)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--save", help="write the timings to this JSON file")
+    parser.add_argument("--baseline", help="compare against timings saved with --save")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="allowed slowdown against the baseline median (default: 0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    command = [os.path.abspath(args.exe)] if args.exe else [sys.executable, "main.py"]
+    timings = [launch_time(command) for _ in range(args.runs)]
+    median = statistics.median(timings)
+    print(f"time to first window: median {median:.3f}s, min {min(timings):.3f}s over {args.runs} run(s)")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"command": " ".join(command), "timings": timings, "median": median}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["median"]
+        limit = baseline * (1 + args.max_regression)
+        print(f"baseline median {baseline:.3f}s, limit {limit:.3f}s")
+        if median > limit:
+            print("FAIL: startup regressed", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
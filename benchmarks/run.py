@@ -0,0 +1,158 @@
+"""Benchmark suite and regression harness for the calculation hot path.
+
+  python benchmarks/run.py                                   # run and print
+  python benchmarks/run.py --save benchmarks/baseline.json   # record a baseline
+  python benchmarks/run.py --baseline benchmarks/baseline.json [--threshold 0.2]
+
+Every benchmark is reported as nanoseconds per employee (or per call for
+the scalar helpers). With --baseline, any benchmark more than --threshold
+slower than its stored value fails the run with exit code 1. Bank holidays
+come from a local HTTP fixture serving the bundled gov.uk snapshot, so runs
+never touch the network.
+"""
+import argparse
+import http.server
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bank_holidays import BankHolidayStore, resource_path
+from batch import calculate_batch
+from bench_batch import synthetic_rows
+from calculations import (
+    calculate_entitlements,
+    calculate_long_service,
+    round_to_quarter_hour,
+    validate_contracted_hours
+)
+from formatting import format_summary
+from logic import compute_leave
+from writers import CsvResultWriter
+
+SNAPSHOT = resource_path("data", "bank-holidays.json")
+
+
+class FixtureHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        with open(SNAPSHOT, "rb") as f:
+            payload = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fixture_server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/bank-holidays.json"
+
+
+def per_call_ns(fn, repeat=5):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+def micro_benchmarks(holidays):
+    result = compute_leave("E0000001", date(2025, 1, 1), date(2025, 12, 31), date(2012, 6, 4),
+                           30.0, "england-and-wales", holidays)
+    return {
+        "round_to_quarter_hour": lambda: round_to_quarter_hour(123.4567),
+        "validate_contracted_hours": lambda: validate_contracted_hours("22.75"),
+        "calculate_entitlements": lambda: calculate_entitlements(30.0, 365, 365, 8),
+        "calculate_long_service": lambda: calculate_long_service(30.0, 12.57, 365, 365),
+        "format_summary": lambda: format_summary(result),
+        "compute_leave": lambda: compute_leave("E0000001", date(2025, 1, 1), date(2025, 12, 31),
+                                               date(2012, 6, 4), 30.0, "england-and-wales", holidays),
+    }
+
+
+def batch_ns_per_employee(size, holidays):
+    start = time.perf_counter()
+    with open(os.devnull, "w", newline="") as sink, CsvResultWriter(sink) as writer:
+        for result in calculate_batch(synthetic_rows(size), holidays):
+            writer.write(result)
+    return (time.perf_counter() - start) / size * 1e9
+
+
+def run(sizes):
+    server, url = start_fixture_server()
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold = []
+        for attempt in range(3):
+            store = BankHolidayStore(url=url, cache_dir=os.path.join(cache_dir, str(attempt)))
+            start = time.perf_counter()
+            store.index()
+            cold.append(time.perf_counter() - start)
+        results["get_bank_holidays (cold fetch)"] = min(cold) * 1e9
+        results["get_bank_holidays (warm)"] = per_call_ns(lambda: store.count(2025, "scotland"))
+        holidays = store.index()
+        for name, fn in micro_benchmarks(holidays).items():
+            results[name] = per_call_ns(fn)
+        for size in sizes:
+            results[f"batch end-to-end ({size} employees)"] = batch_ns_per_employee(size, holidays)
+    server.shutdown()
+    return results
+
+
+def compare(results, baseline, threshold):
+    failures = []
+    for name, value in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        change = value / previous - 1
+        flag = "REGRESSION" if change > threshold else ""
+        print(f"  {name:<45} {previous:>14.0f} -> {value:>14.0f} ns  {change:+7.1%} {flag}")
+        if flag:
+            failures.append(name)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000],
+                        help="synthetic workforce sizes for the end-to-end batch benchmark")
+    parser.add_argument("--save", help="write results to this JSON baseline")
+    parser.add_argument("--baseline", help="compare against this JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown per benchmark (default: 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes)
+    for name, value in results.items():
+        print(f"{name:<47} {value:>14.0f} ns")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "results_ns": results}, f, indent=2)
+        print(f"Baseline written to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results_ns"]
+        print(f"Compared with {args.baseline} (threshold {args.threshold:.0%}):")
+        failures = compare(results, baseline, args.threshold)
+        if failures:
+            print(f"FAIL: {len(failures)} benchmark(s) regressed", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
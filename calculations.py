@@ -1,31 +1,60 @@
-from datetime import datetime
-import requests
+from datetime import timedelta
+from bank_holidays import BankHolidayError, default_store
 
 weeks_entitlement = 5
 WTE = 37.5
 long_service_years = 5
 
+# Bump when a change to the rules below alters results, so stored batch
+# results (result_store) are recalculated.
+RULES_VERSION = 2
+
+REGIONS = {
+    "England & Wales": "england-and-wales",
+    "Scotland": "scotland",
+    "Northern Ireland": "northern-ireland"
+}
+
+REGION_NAMES = {slug: name for name, slug in REGIONS.items()}
+
+def region_slug(region):
+    if not region:
+        return "england-and-wales"
+    if region in REGIONS.values():
+        return region
+    if region in REGIONS:
+        return REGIONS[region]
+    raise ValueError(f"Unknown bank holiday region: {region}")
+
 def get_bank_holidays(year, region="england-and-wales"):
+    return default_store().count(year, region)
+
+def get_bank_holiday_index():
+    return default_store().index()
+
+def prewarm_bank_holidays():
     try:
-        url = "https://www.gov.uk/bank-holidays.json"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        holidays = data.get(region, {}).get("events", [])
-        return sum(1 for h in holidays if datetime.strptime(h["date"], "%Y-%m-%d").year == year)
-    except Exception:
-        return "Unavailable"
+        get_bank_holiday_index()
+    except BankHolidayError:
+        pass  # the Calculate button will report it
 
 def round_to_quarter_hour(hours):
     return round(hours * 4) / 4
 
+HOURS_ERROR = "Contracted hours must be between 0 and 40 in 15-minute increments."
+
 def validate_contracted_hours(value):
     try:
         hours = float(value)
         return 0 <= hours <= 40 and round(hours * 4) == hours * 4
-    except ValueError:
+    except (ValueError, OverflowError):
         return False
 
+def parse_contracted_hours(value):
+    if not validate_contracted_hours(value):
+        raise ValueError(HOURS_ERROR)
+    return float(value)
+
 def calculate_entitlements(contracted_hours, leave_days, days_in_year, bank_holidays):
     base_entitlement = weeks_entitlement * WTE
     bh_entitlement = bank_holidays * 7.5
@@ -37,9 +66,72 @@ def calculate_entitlements(contracted_hours, leave_days, days_in_year, bank_holi
 
     return prorated, base, bh
 
+def long_service_note(blocks):
+    if blocks == 0:
+        return f"⚠️ Not eligible for long service award (less than {long_service_years} years)"
+    return f"Eligible: {blocks} × {long_service_years}-year block(s)"
+
+def long_service_blocks(years_employed):
+    return max(int(years_employed // long_service_years), 0)
+
 def calculate_long_service(contracted_hours, years_employed, leave_days, days_in_year):
-    blocks = int(years_employed // long_service_years)
+    blocks = long_service_blocks(years_employed)
     if blocks == 0:
-        return 0, f"⚠️ Not eligible for long service award (less than {long_service_years} years)"
+        return 0, long_service_note(blocks)
     award = round_to_quarter_hour((((contracted_hours / WTE) * 7.5) * blocks) * (leave_days / days_in_year))
-    return award, f"Eligible: {blocks} × {long_service_years}-year block(s)"
+    return award, long_service_note(blocks)
+
+# Contract-hours timelines: a sorted list of (effective_date, hours) changes.
+# Each segment of the leave period is weighted by its days and the weighted
+# total is rounded once, so splitting a period never adds rounding drift.
+
+def hours_timeline(start_date, end_date, contracted_hours, hours_changes):
+    # Changes effective on or before the start of the period replace the
+    # starting hours, later ones open a new segment, and changes after the
+    # end of the period are dropped.
+    timeline = [(start_date, contracted_hours)]
+    for effective, hours in sorted(hours_changes):
+        if effective <= start_date:
+            timeline[0] = (start_date, hours)
+        elif effective <= end_date:
+            timeline.append((effective, hours))
+    return timeline
+
+def hours_segments(timeline, start_date, end_date):
+    if not timeline or timeline[0][0] > start_date:
+        raise ValueError("No contracted hours in effect at the start of the leave period.")
+    segments = []
+    for i, (effective, hours) in enumerate(timeline):
+        seg_start = max(effective, start_date)
+        seg_end = end_date
+        if i + 1 < len(timeline):
+            seg_end = min(end_date, timeline[i + 1][0] - timedelta(days=1))
+        if seg_start <= seg_end:
+            segments.append((hours, (seg_end - seg_start).days + 1))
+    return segments
+
+def calculate_entitlements_timeline(segments, days_in_year, bank_holidays):
+    if len(segments) == 1:
+        hours, days = segments[0]
+        return calculate_entitlements(hours, days, days_in_year, bank_holidays)
+    base_entitlement = weeks_entitlement * WTE
+    bh_entitlement = bank_holidays * 7.5
+    full_time = base_entitlement + bh_entitlement
+    fte_fraction = sum(hours * days for hours, days in segments) / WTE / days_in_year
+
+    prorated = round_to_quarter_hour(full_time * fte_fraction)
+    base = round_to_quarter_hour(base_entitlement * fte_fraction)
+    bh = round_to_quarter_hour(bh_entitlement * fte_fraction)
+
+    return prorated, base, bh
+
+def calculate_long_service_timeline(segments, years_employed, days_in_year):
+    if len(segments) == 1:
+        hours, days = segments[0]
+        return calculate_long_service(hours, years_employed, days, days_in_year)
+    blocks = long_service_blocks(years_employed)
+    if blocks == 0:
+        return 0, long_service_note(blocks)
+    fte_fraction = sum(hours * days for hours, days in segments) / WTE / days_in_year
+    award = round_to_quarter_hour(7.5 * blocks * fte_fraction)
+    return award, long_service_note(blocks)
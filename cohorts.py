@@ -0,0 +1,68 @@
+from datetime import date
+import numpy as np
+import instrumentation
+import leave_calendar
+from calculations import long_service_years
+
+# Service years and long service blocks depend only on the hire date and the
+# end of the leave period, and most employees share that pair with others
+# in the same run. LongServiceTable works them out once per (hire date,
+# period end) cohort and hands every chunk its values as array lookups.
+
+KEY_SCALE = 1 << 22   # above date.max.toordinal(), so (hire, end) packs into one int64
+
+
+class LongServiceTable:
+    def __init__(self):
+        # Cohorts seen so far in the run, sorted by key
+        self.keys = np.empty(0, dtype=np.int64)
+        self.years = np.empty(0)
+        self.blocks = np.empty(0, dtype=np.int64)
+        self._stats = {"lookups": 0, "cohorts_computed": 0}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, hire_days, end_days):
+        # Ordinal day numbers per employee -> (years_employed, blocks) arrays
+        keys = np.asarray(hire_days, dtype=np.int64) * KEY_SCALE + np.asarray(end_days, dtype=np.int64)
+        cohorts, rows = np.unique(keys, return_inverse=True)
+        positions = np.searchsorted(self.keys, cohorts)
+        known = positions < len(self.keys)
+        known[known] = self.keys[positions[known]] == cohorts[known]
+        new = cohorts[~known]
+        if new.size:
+            years = np.array([leave_calendar.service_years(date.fromordinal(key // KEY_SCALE),
+                                                           date.fromordinal(key % KEY_SCALE))
+                              for key in new.tolist()])
+            at = np.searchsorted(self.keys, new)
+            self.keys = np.insert(self.keys, at, new)
+            self.years = np.insert(self.years, at, years)
+            blocks = np.maximum(np.floor_divide(years, long_service_years).astype(np.int64), 0)
+            self.blocks = np.insert(self.blocks, at, blocks)
+            positions = np.searchsorted(self.keys, cohorts)
+        self._stats["lookups"] += len(keys)
+        self._stats["cohorts_computed"] += len(new)
+        positions = positions[rows]
+        return self.years[positions], self.blocks[positions]
+
+    def take_stats(self):
+        # Counts since the last call, for the parent process to record
+        stats = dict(self._stats)
+        self._stats = dict.fromkeys(stats, 0)
+        return stats
+
+
+def record_stats(stats):
+    for name, value in stats.items():
+        instrumentation.count(f"long_service.{name}", value)
+
+
+def reuse_summary():
+    counters = instrumentation.snapshot()["counters"]
+    lookups = counters.get("long_service.lookups", 0)
+    if not lookups:
+        return None
+    computed = counters.get("long_service.cohorts_computed", 0)
+    return (f"Long service: {lookups} employee(s) in {computed} (hire date, period end) cohort(s); "
+            f"{1 - computed / lookups:.1%} of service calculations reused")
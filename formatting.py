@@ -1,17 +1,112 @@
-def format_summary(emp_number, hire_date, contracted_hours, days_employed, years_employed,
-                   bank_holiday_count, leave_year, region, start_date, end_date, leave_days,
-                   prorated_entitlement, prorated_base, prorated_bh,
-                   long_service_award, long_service_note, total_entitlement):
+import re
+
+RESULT_COLUMNS = [
+    "employee", "region", "leave_year", "start_date", "end_date", "leave_days",
+    "contracted_hours", "base_hours", "bank_holiday_hours", "basic_hours",
+    "long_service_hours", "total_hours",
+]
+
+# The OPTIMA UPLOAD block of the summary, one column per field
+OPTIMA_COLUMNS = [
+    "employee", "leave_year", "entitlement_basis", "entitlement_type", "units",
+    "period_start", "base_hours", "long_service_hours", "carry_forward",
+    "lieu_hours", "adjusted_hours", "total_hours",
+]
+
+# Characters in the summary that the core PDF fonts (latin-1) cannot draw
+PDF_REPLACEMENTS = str.maketrans({
+    "→": "->", "├": "+", "└": "+", "│": "|", "─": "-", "×": "x",
+})
+NON_LATIN1 = re.compile(r"[^\x00-\xff]+ ?")
+
+
+def result_values(result):
+    # In RESULT_COLUMNS order
+    return (
+        result.emp_number,
+        result.region,
+        result.leave_year,
+        result.start_date.isoformat(),
+        result.end_date.isoformat(),
+        result.leave_days,
+        result.contracted_hours,
+        f"{result.prorated_base:.2f}",
+        f"{result.prorated_bh:.2f}",
+        f"{result.prorated_entitlement:.2f}",
+        f"{result.long_service_award:.2f}",
+        f"{result.total_entitlement:.2f}",
+    )
+
+
+def optima_values(result):
+    # In OPTIMA_COLUMNS order
+    return (
+        result.emp_number,
+        result.leave_year,
+        "Annual Rate",
+        "Annual Leave",
+        "Hours Only",
+        "January",
+        f"{result.prorated_entitlement:.2f}",
+        f"{result.long_service_award:.2f}",
+        0,
+        0,
+        0,
+        f"{result.total_entitlement:.2f}",
+    )
+
+
+def result_row(result):
+    return dict(zip(RESULT_COLUMNS, result_values(result)))
+
+
+def result_to_dict(result):
+    return {
+        "employee": result.emp_number,
+        "hire_date": result.hire_date.isoformat(),
+        "start_date": result.start_date.isoformat(),
+        "end_date": result.end_date.isoformat(),
+        "region": result.region,
+        "leave_year": result.leave_year,
+        "contracted_hours": result.contracted_hours,
+        "hours_changes": [{"effective_date": effective.isoformat(), "hours": hours}
+                          for effective, hours in result.hours_changes],
+        "days_employed": result.days_employed,
+        "years_employed": round(result.years_employed, 2),
+        "leave_days": result.leave_days,
+        "bank_holidays": result.bank_holiday_count,
+        "base_hours": result.prorated_base,
+        "bank_holiday_hours": result.prorated_bh,
+        "basic_hours": result.prorated_entitlement,
+        "long_service_hours": result.long_service_award,
+        "long_service_blocks": result.long_service_blocks,
+        "total_hours": result.total_entitlement,
+    }
+
+
+def pdf_lines(result):
+    text = NON_LATIN1.sub("", format_summary(result).translate(PDF_REPLACEMENTS))
+    return text.splitlines()
+
+
+def format_hours(result):
+    changes = "".join(f", {hours} from {effective.strftime('%d %b %Y')}"
+                      for effective, hours in result.hours_changes)
+    return f"{result.contracted_hours} hrs/week{changes}"
+
+
+def format_summary(result):
+    r = result
     return f"""\
 ================== ANNUAL LEAVE SUMMARY ==================
 
-👤 Employee: {emp_number}
-📅 Hire Date: {hire_date.strftime('%d %b %Y')}
-🕒 Contracted Hours: {contracted_hours} hrs/week
-📈 Continuous Service: {days_employed} days ({years_employed:.2f} yrs)
-🏖️ Bank Holidays in {leave_year} ({region}): {bank_holiday_count}
+👤 Employee: {r.emp_number}
+📅 Hire Date: {r.hire_date.strftime('%d %b %Y')}
+🕒 Contracted Hours: {format_hours(r)}
+📈 Continuous Service: {r.days_employed} days ({r.years_employed:.2f} yrs)
+🏖️ Bank Holidays in {r.leave_year} ({r.region_name}): {r.bank_holiday_count}
 
-📆 Leave Period: {start_date.strftime('%d %b %Y')} → {end_date.strftime('%d %b %Y')} ({leave_days} days)
+📆 Leave Period: {r.start_date.strftime('%d %b %Y')} → {r.end_date.strftime('%d %b %Y')} ({r.leave_days} days)
 
 ------------------ OPTIMA UPLOAD ------------------
 Entitlement Basis : Annual Rate
@@ -19,20 +114,20 @@ Entitlement Type  : Annual Leave
 Units             : Hours Only
 Period Start      : January
 
-Base Hours        : {prorated_entitlement:.2f}
-Long Service Hrs  : {long_service_award:.2f}
+Base Hours        : {r.prorated_entitlement:.2f}
+Long Service Hrs  : {r.long_service_award:.2f}
 Carry Forward     : 0
 Lieu Hours        : 0
 Adjusted Hours    : 0
-Total Hours       : {total_entitlement:.2f}
+Total Hours       : {r.total_entitlement:.2f}
 
 ------------------ BREAKDOWN ------------------
-Total Entitlement : {total_entitlement:.2f}
-  ├─ Basic        : {prorated_entitlement:.2f}
-  │   ├─ Base     : {prorated_base:.2f}
-  │   └─ Bank Hol : {prorated_bh:.2f}
-  └─ Long Service : {long_service_award:.2f} - {long_service_note}
+Total Entitlement : {r.total_entitlement:.2f}
+  ├─ Basic        : {r.prorated_entitlement:.2f}
+  │   ├─ Base     : {r.prorated_base:.2f}
+  │   └─ Bank Hol : {r.prorated_bh:.2f}
+  └─ Long Service : {r.long_service_award:.2f} - {r.long_service_note}
 
 📝 All values rounded to the nearest 15 minutes
 ==================================================
-"""
\ No newline at end of file
+"""
@@ -1,11 +1,42 @@
+import os
+import threading
 import webbrowser
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 from ttkbootstrap.widgets import DateEntry
 from ttkbootstrap.dialogs import Messagebox
 from datetime import datetime
-from logic import calculate_leave
-from output_utils import export_to_csv, export_to_pdf, print_summary
+from calculations import prewarm_bank_holidays
+from logic import BackgroundCalculator, Debouncer, calculate_leave, show_summary
+
+
+# Export helpers are imported on first use so they stay off the startup path
+def export_csv(result):
+    from output_utils import export_to_csv
+    export_to_csv(result)
+
+
+def export_json(result):
+    from output_utils import export_to_json
+    export_to_json(result)
+
+
+def export_pdf(result):
+    from output_utils import export_to_pdf
+    export_to_pdf(result)
+
+
+def print_output(result):
+    from output_utils import print_summary
+    print_summary(result)
+
+
+def watch(entry, callback):
+    # Call callback whenever the text of a (ttk) Entry changes
+    var = tb.StringVar(value=entry.get())
+    entry.configure(textvariable=var)
+    var.trace_add("write", lambda *args: callback())
+    return var
 
 
 def build_gui():
@@ -18,6 +49,7 @@ def build_gui():
     # Theme switcher logic
     def set_theme(theme_name):
         root.style.theme_use(theme_name)
+        recalculate()  # re-render the summary in the new theme (a cache hit if nothing changed)
 
     # Menu bar
     menubar = tb.Menu(root)
@@ -55,9 +87,22 @@ def build_gui():
     tb.Label(root, text="🗓️ Annual Leave Calculator", font=("Segoe UI", 20, "bold"), bootstyle="primary").pack(pady=(20, 5))
     tb.Label(root, text="Calculate prorated leave and long service awards with ease", font=("Segoe UI", 11)).pack(pady=(0, 15))
 
+    # Tabs: the single-employee calculator and the roster of a whole file
+    notebook = tb.Notebook(root)
+    notebook.pack(fill=BOTH, expand=True, padx=20, pady=10)
+
     # Main horizontal container
-    main_frame = tb.Frame(root)
-    main_frame.pack(fill=BOTH, expand=True, padx=20, pady=10)
+    main_frame = tb.Frame(notebook, padding=(0, 10))
+    notebook.add(main_frame, text="Calculator")
+    roster_frame = tb.Frame(notebook, padding=10)
+    notebook.add(roster_frame, text="Roster")
+
+    def open_tab(event):
+        if notebook.select() == str(roster_frame) and not roster_frame.winfo_children():
+            from roster_tab import build_roster_tab  # loads NumPy and the batch engine on first use
+            build_roster_tab(roster_frame, root)
+
+    notebook.bind("<<NotebookTabChanged>>", open_tab)
 
     # Left: Input section
     input_frame = tb.Frame(main_frame)
@@ -109,14 +154,66 @@ def build_gui():
     # Buttons
     button_frame = tb.Frame(input_frame)
     button_frame.pack(pady=20)
+
+    progress = tb.Progressbar(input_frame, mode="indeterminate", bootstyle="info-striped")
+    status = tb.Label(input_frame, text="", bootstyle="danger", wraplength=250)
+    status.pack(fill=X)
+
+    def show_result(result):
+        status.configure(text="")
+        show_summary(output_box, result)
+
+    def show_problem(e):
+        status.configure(text=f"Invalid input: {e}")
+
+    def set_busy(busy):
+        if busy:
+            progress.pack(fill=X, pady=(0, 10))
+            progress.start(10)
+        else:
+            progress.stop()
+            progress.pack_forget()
+
+    calculator = BackgroundCalculator(
+        root,
+        on_busy=set_busy,
+        on_result=show_result,
+        on_error=show_problem,
+    )
+
+    # Live recalculation: edits are debounced, the region applies at once,
+    # and inputs seen before come straight from the calculator's cache
+    def recalculate():
+        calculate_leave(emp_entry, start_entry, end_entry, hire_entry,
+                        hours_entry, region_var, calculator, on_invalid=show_problem)
+
+    debounced = Debouncer(root, recalculate)
+    for entry in (emp_entry, hours_entry, hire_entry.entry, start_entry.entry, end_entry.entry):
+        watch(entry, debounced)
+    region_var.trace_add("write", lambda *args: recalculate())
+
+    def calculate_now():
+        debounced.cancel()
+        calculate_leave(emp_entry, start_entry, end_entry, hire_entry,
+                        hours_entry, region_var, calculator)
+
     tb.Button(button_frame, text="🧮 Calculate", bootstyle=PRIMARY,
-              command=lambda: calculate_leave(emp_entry, start_entry, end_entry, hire_entry,
-                                              hours_entry, region_var, output_box)).grid(row=0, column=0, padx=10)
+              command=calculate_now).grid(row=0, column=0, padx=10)
     tb.Button(button_frame, text="📤 Export CSV", bootstyle=INFO,
-              command=lambda: export_to_csv(output_box)).grid(row=0, column=1, padx=10)
+              command=lambda: export_csv(calculator.result)).grid(row=0, column=1, padx=10)
     tb.Button(button_frame, text="📝 Export PDF", bootstyle=SUCCESS,
-              command=lambda: export_to_pdf(output_box)).grid(row=1, column=0, padx=10, pady=5)
+              command=lambda: export_pdf(calculator.result)).grid(row=1, column=0, padx=10, pady=5)
     tb.Button(button_frame, text="🖨️ Print", bootstyle=SECONDARY,
-              command=lambda: print_summary()).grid(row=1, column=1, padx=10, pady=5)
+              command=lambda: print_output(calculator.result)).grid(row=1, column=1, padx=10, pady=5)
+    tb.Button(button_frame, text="🧾 Export JSON", bootstyle=INFO,
+              command=lambda: export_json(calculator.result)).grid(row=2, column=0, padx=10, pady=5)
+
+    # Load the bank holiday cache (or fetch it) once the window is up, so the
+    # first Calculate click usually finds it warm
+    root.after_idle(lambda: threading.Thread(target=prewarm_bank_holidays, daemon=True).start())
+
+    if os.environ.get("LEAVE_CALC_STARTUP_PROBE"):
+        # benchmarks/bench_startup.py: exit as soon as the first frame is drawn
+        root.after_idle(root.destroy)
 
     root.mainloop()
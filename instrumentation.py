@@ -0,0 +1,111 @@
+import cProfile
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Process-wide timing spans and counters. Recording is a dict update under a
+# lock, cheap enough to leave on around every stage (fetch, compute, format,
+# export); report() turns them into a per-stage summary.
+
+_lock = threading.Lock()
+_spans = {}      # name -> [calls, total seconds]
+_counters = {}   # name -> count
+
+
+def record(name, seconds):
+    with _lock:
+        entry = _spans.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+
+def count(name, amount=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+@contextmanager
+def span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def snapshot():
+    with _lock:
+        return {"spans": {name: tuple(entry) for name, entry in _spans.items()},
+                "counters": dict(_counters)}
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def report():
+    data = snapshot()
+    lines = ["Stage timings:"]
+    for name, (calls, seconds) in sorted(data["spans"].items(), key=lambda item: -item[1][1]):
+        lines.append(f"  {name:<32} {seconds * 1000:>10.1f} ms  {calls:>8} call(s)")
+    if data["counters"]:
+        lines.append("Counters:")
+        for name, value in sorted(data["counters"].items()):
+            lines.append(f"  {name:<32} {value:>10}")
+    return "\n".join(lines)
+
+
+class LatencyRecorder:
+    # Per-row cost for the batch engine. Rows are computed a chunk at a time
+    # and never timed one by one, so each chunk contributes its mean time per
+    # row, weighted by its row count: the percentiles show how chunk costs
+    # vary, not the tail of individual rows. Memory grows with the number of
+    # chunks, not rows.
+    def __init__(self):
+        self._samples = []   # (seconds per row, rows)
+        self._start = time.perf_counter()
+        self.rows = 0
+
+    def add(self, seconds, rows):
+        if rows:
+            self._samples.append((seconds / rows, rows))
+            self.rows += rows
+
+    def percentile(self, fraction):
+        if not self._samples:
+            return 0.0
+        target = fraction * self.rows
+        seen = 0
+        for per_row, rows in sorted(self._samples):
+            seen += rows
+            if seen >= target:
+                return per_row
+        return per_row
+
+    def summary(self):
+        elapsed = time.perf_counter() - self._start
+        rate = self.rows / elapsed if elapsed else 0.0
+        return (f"Processed {self.rows} row(s) in {elapsed:.2f}s ({rate:,.0f} rows/s); "
+                f"chunk mean time per row p50 {self.percentile(0.5) * 1e6:.1f} us, "
+                f"p99 {self.percentile(0.99) * 1e6:.1f} us over {len(self._samples)} chunk(s)")
+
+
+@contextmanager
+def profiled(path):
+    # cProfile the enclosed block and write pstats output to path
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+def print_profile(path, limit=20, stream=None):
+    # The limit most expensive functions by cumulative time
+    pstats.Stats(path, stream=stream or sys.stderr).sort_stats("cumulative").print_stats(limit)
@@ -0,0 +1,38 @@
+import numpy as np
+from calculations import weeks_entitlement, WTE, long_service_years
+
+# Array versions of calculations.calculate_entitlements/calculate_long_service.
+# Operations are applied in the same order as the scalar code so every
+# element is bit-identical to the scalar result (np.round, like round(),
+# rounds halves to even).
+
+def round_to_quarter_hour_array(hours):
+    # + 0.0 turns the -0.0 np.round gives for small negatives into the 0.0 round() gives
+    return np.round(hours * 4) / 4 + 0.0
+
+def calculate_entitlements_array(contracted_hours, leave_days, days_in_year, bank_holidays):
+    contracted_hours = np.asarray(contracted_hours, dtype=np.float64)
+    fte = contracted_hours / 37.5
+    period = np.asarray(leave_days) / np.asarray(days_in_year)
+
+    base_entitlement = weeks_entitlement * WTE
+    bh_entitlement = np.asarray(bank_holidays) * 7.5
+    full_time = base_entitlement + bh_entitlement
+
+    prorated = round_to_quarter_hour_array(fte * full_time * period)
+    base = round_to_quarter_hour_array(fte * base_entitlement * period)
+    bh = round_to_quarter_hour_array(fte * bh_entitlement * period)
+    return prorated, base, bh
+
+def calculate_long_service_array(contracted_hours, years_employed, leave_days, days_in_year):
+    blocks = np.floor_divide(np.asarray(years_employed, dtype=np.float64), long_service_years).astype(np.int64)
+    blocks = np.maximum(blocks, 0)   # no service yet, not negative service
+    return long_service_award_array(contracted_hours, blocks, leave_days, days_in_year), blocks
+
+def long_service_award_array(contracted_hours, blocks, leave_days, days_in_year):
+    contracted_hours = np.asarray(contracted_hours, dtype=np.float64)
+    blocks = np.asarray(blocks)
+    period = np.asarray(leave_days) / np.asarray(days_in_year)
+    award = round_to_quarter_hour_array((((contracted_hours / WTE) * 7.5) * blocks) * period)
+    award[blocks == 0] = 0.0
+    return award
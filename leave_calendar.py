@@ -0,0 +1,33 @@
+from calendar import isleap
+from datetime import date
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def days_in_year(year):
+    return 366 if isleap(year) else 365
+
+
+def anniversary(hire_date, years):
+    try:
+        return hire_date.replace(year=hire_date.year + years)
+    except ValueError:
+        # 29 February hires reach their anniversary on 28 February in other years
+        return date(hire_date.year + years, 2, 28)
+
+
+def completed_years(hire_date, on_date):
+    years = on_date.year - hire_date.year
+    if anniversary(hire_date, years) > on_date:
+        years -= 1
+    return years
+
+
+@lru_cache(maxsize=65536)
+def service_years(hire_date, on_date):
+    # Whole years from anniversaries plus the fraction of the current service
+    # year, so int(service_years) changes exactly on each anniversary.
+    years = completed_years(hire_date, on_date)
+    last = anniversary(hire_date, years)
+    following = anniversary(hire_date, years + 1)
+    return years + (on_date - last).days / (following - last).days
@@ -1,59 +1,284 @@
-from ttkbootstrap.dialogs import Messagebox
-from datetime import datetime
+import queue
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
 from calculations import (
+    REGION_NAMES,
     get_bank_holidays,
+    get_bank_holiday_index,
+    long_service_blocks,
+    long_service_note,
+    region_slug,
     round_to_quarter_hour,
-    validate_contracted_hours,
+    parse_contracted_hours,
     calculate_entitlements,
-    calculate_long_service
+    calculate_entitlements_timeline,
+    calculate_long_service,
+    calculate_long_service_timeline,
+    hours_segments,
+    hours_timeline
 )
 from formatting import format_summary
+import instrumentation
+import leave_calendar
 
-def calculate_leave(emp_entry, start_entry, end_entry, hire_entry,
-                    hours_entry, region_var, output_box):
-    try:
-        emp_number = emp_entry.get().strip()
-        start_date = start_entry.get_date()
-        end_date = end_entry.get_date()
-        hire_date = hire_entry.get_date()
-
-        contracted_input = hours_entry.get().strip() or "37.5"
-        if not validate_contracted_hours(contracted_input):
-            Messagebox.show_error("Contracted hours must be between 0 and 40 in 15-minute increments.")
-            return
-        contracted_hours = float(contracted_input)
-
-        leave_year = end_date.year
-        region_map = {
-            "England & Wales": "england-and-wales",
-            "Scotland": "scotland",
-            "Northern Ireland": "northern-ireland"
-        }
-        selected_region = region_map.get(region_var.get(), "england-and-wales")
+def _as_date(value):
+    # DateEntry.get_date() returns datetimes; the calendar helpers cache on dates
+    return value.date() if isinstance(value, datetime) else value
+
+@dataclass
+class LeaveResult:
+    # One employee's calculation. Slots keep a batch of results small, and the
+    # text, CSV, PDF and JSON renderers all read these fields directly.
+    __slots__ = (
+        "emp_number", "hire_date", "start_date", "end_date", "region", "leave_year",
+        "contracted_hours", "days_employed", "years_employed", "leave_days",
+        "bank_holiday_count", "prorated_entitlement", "prorated_base", "prorated_bh",
+        "long_service_award", "long_service_blocks", "total_entitlement", "hours_changes",
+    )
+    emp_number: str
+    hire_date: date
+    start_date: date
+    end_date: date
+    region: str
+    leave_year: int
+    contracted_hours: float
+    days_employed: int
+    years_employed: float
+    leave_days: int
+    bank_holiday_count: int
+    prorated_entitlement: float
+    prorated_base: float
+    prorated_bh: float
+    long_service_award: float
+    long_service_blocks: int
+    total_entitlement: float
+    hours_changes: tuple     # ((effective_date, hours), ...) after start_date; () if none
+
+    @property
+    def region_name(self):
+        return REGION_NAMES.get(self.region, self.region)
+
+    @property
+    def long_service_note(self):
+        return long_service_note(self.long_service_blocks)
+
+def compute_leave(*args, **kwargs):
+    with instrumentation.span("compute"):
+        return _compute_leave(*args, **kwargs)
+
+def _compute_leave(emp_number, start_date, end_date, hire_date, contracted_hours,
+                  region="England & Wales", holidays=None, hours_changes=()):
+    leave_year = end_date.year
+    selected_region = region_slug(region)
+    if holidays is None:
         bank_holiday_count = get_bank_holidays(leave_year, selected_region)
+    else:
+        bank_holiday_count = holidays.count(leave_year, selected_region)
 
-        days_employed = (end_date - hire_date).days
-        years_employed = days_employed / 365.25
-        days_in_year = 366 if (leave_year % 4 == 0 and (leave_year % 100 != 0 or leave_year % 400 == 0)) else 365
-        leave_days = (end_date - start_date).days + 1
+    days_employed = (end_date - hire_date).days
+    years_employed = leave_calendar.service_years(_as_date(hire_date), _as_date(end_date))
+    days_in_year = leave_calendar.days_in_year(leave_year)
+    leave_days = (end_date - start_date).days + 1
 
+    if hours_changes:
+        timeline = hours_timeline(start_date, end_date, contracted_hours, hours_changes)
+        contracted_hours, hours_changes = timeline[0][1], tuple(timeline[1:])
+    if hours_changes:
+        segments = hours_segments(((start_date, contracted_hours),) + hours_changes, start_date, end_date)
+        prorated_entitlement, prorated_base, prorated_bh = calculate_entitlements_timeline(
+            segments, days_in_year, bank_holiday_count
+        )
+        long_service_award, _ = calculate_long_service_timeline(segments, years_employed, days_in_year)
+    else:
         prorated_entitlement, prorated_base, prorated_bh = calculate_entitlements(
             contracted_hours, leave_days, days_in_year, bank_holiday_count
         )
-        long_service_award, long_service_note = calculate_long_service(
+        long_service_award, _ = calculate_long_service(
             contracted_hours, years_employed, leave_days, days_in_year
         )
-        total_entitlement = prorated_entitlement + long_service_award
+    total_entitlement = prorated_entitlement + long_service_award
 
-        summary = format_summary(
-            emp_number, hire_date, contracted_hours, days_employed, years_employed,
-            bank_holiday_count, leave_year, region_var.get(), start_date, end_date, leave_days,
-            prorated_entitlement, prorated_base, prorated_bh,
-            long_service_award, long_service_note, total_entitlement
-        )
+    return LeaveResult(
+        emp_number=emp_number,
+        hire_date=hire_date,
+        start_date=start_date,
+        end_date=end_date,
+        region=selected_region,
+        leave_year=leave_year,
+        contracted_hours=contracted_hours,
+        days_employed=days_employed,
+        years_employed=years_employed,
+        leave_days=leave_days,
+        bank_holiday_count=bank_holiday_count,
+        prorated_entitlement=prorated_entitlement,
+        prorated_base=prorated_base,
+        prorated_bh=prorated_bh,
+        long_service_award=long_service_award,
+        long_service_blocks=long_service_blocks(years_employed),
+        total_entitlement=total_entitlement,
+        hours_changes=tuple(hours_changes),
+    )
+
+POLL_MS = 50
+DEBOUNCE_MS = 300          # quiet time after the last edit before recalculating
+RESULT_CACHE_SIZE = 256
+
+def input_key(inputs):
+    # (employee, start, end, hire, hours, region): the cache key for a result
+    return (
+        inputs["emp_number"],
+        _as_date(inputs["start_date"]),
+        _as_date(inputs["end_date"]),
+        _as_date(inputs["hire_date"]),
+        inputs["contracted_hours"],
+        region_slug(inputs["region"]),
+    )
+
+class BackgroundCalculator:
+    # Runs compute_leave on a worker thread so the Tk main loop never waits on
+    # the bank holiday fetch. Only one calculation is in flight at a time:
+    # submissions while busy replace the pending inputs, so any number of
+    # them collapse into at most one follow-up run with the newest inputs,
+    # and a result made stale by a newer submission is dropped instead of
+    # shown. The last RESULT_CACHE_SIZE results are kept by input_key, so
+    # going back to earlier inputs is shown at once without recomputing.
+    # Every result records the bank holiday data it was counted from, and the
+    # cache is cleared as soon as a calculation sees newer data.
+    def __init__(self, root, on_busy, on_result, on_error, cache_size=RESULT_CACHE_SIZE):
+        self.root = root
+        self.on_busy = on_busy
+        self.on_result = on_result
+        self.on_error = on_error
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._holiday_version = None
+        self._results = queue.Queue()
+        self._running = False
+        self._pending = None
+        self._latest = None
+        self.result = None
+
+    def submit(self, inputs):
+        key = input_key(inputs)
+        self._latest = key
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self._pending = None
+            self._show(cached)
+            return
+        if self._running:
+            self._pending = inputs
+            return
+        self.on_busy(True)
+        self._start(inputs)
 
-        output_box.delete("1.0", "end")
-        output_box.insert("end", summary)
+    def _start(self, inputs):
+        self._running = True
+        threading.Thread(target=self._work, args=(inputs,), daemon=True).start()
+        self.root.after(POLL_MS, self._poll)
 
+    def _work(self, inputs):
+        try:
+            holidays = get_bank_holiday_index()
+            result = compute_leave(**inputs, holidays=holidays)
+            self._results.put((inputs, (holidays.version, result), None))
+        except Exception as e:
+            self._results.put((inputs, None, e))
+
+    def _poll(self):
+        # Tk widgets are only touched here, on the main thread
+        try:
+            inputs, result, error = self._results.get_nowait()
+        except queue.Empty:
+            self.root.after(POLL_MS, self._poll)
+            return
+        self._running = False
+        key = input_key(inputs)
+        if error is None:
+            version, result = result
+            if version != self._holiday_version:
+                self._cache.clear()   # counted from older bank holiday data
+                self._holiday_version = version
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        pending, self._pending = self._pending, None
+        if pending is not None and input_key(pending) != key:
+            self._start(pending)
+            return
+        self.on_busy(False)
+        if key != self._latest:
+            return  # superseded by a cached result shown meanwhile
+        if error is not None:
+            self.on_error(error)
+        else:
+            self._show(result)
+
+    def _show(self, result):
+        self.result = result
+        self.on_result(result)
+
+class Debouncer:
+    # Calls callback once, delay_ms after the last of a burst of calls
+    def __init__(self, root, callback, delay_ms=DEBOUNCE_MS):
+        self.root = root
+        self.callback = callback
+        self.delay_ms = delay_ms
+        self._after = None
+
+    def __call__(self, *args):
+        self.cancel()
+        self._after = self.root.after(self.delay_ms, self._fire)
+
+    def cancel(self):
+        if self._after is not None:
+            self.root.after_cancel(self._after)
+            self._after = None
+
+    def _fire(self):
+        self._after = None
+        self.callback()
+
+def read_inputs(emp_entry, start_entry, end_entry, hire_entry, hours_entry, region_var):
+    contracted_hours = parse_contracted_hours(hours_entry.get().strip() or "37.5")
+    return {
+        "emp_number": emp_entry.get().strip(),
+        "start_date": start_entry.get_date(),
+        "end_date": end_entry.get_date(),
+        "hire_date": hire_entry.get_date(),
+        "contracted_hours": contracted_hours,
+        "region": region_var.get(),
+    }
+
+def show_summary(output_box, result):
+    # The summary layout has a fixed number of lines, so only the lines whose
+    # text changed are rewritten instead of replacing the whole widget
+    with instrumentation.span("format"):
+        lines = format_summary(result).split("\n")
+        current = output_box.get("1.0", "end-1c").split("\n")
+        if len(current) != len(lines):
+            output_box.delete("1.0", "end")
+            output_box.insert("end", "\n".join(lines))
+            return
+        for number, (before, after) in enumerate(zip(current, lines), start=1):
+            if before != after:
+                output_box.delete(f"{number}.0", f"{number}.end")
+                output_box.insert(f"{number}.0", after)
+
+def calculate_leave(emp_entry, start_entry, end_entry, hire_entry,
+                    hours_entry, region_var, calculator, on_invalid=None):
+    # on_invalid: report bad input without a dialog (live recalculation
+    # runs while the user is still typing)
+    try:
+        inputs = read_inputs(emp_entry, start_entry, end_entry, hire_entry, hours_entry, region_var)
     except Exception as e:
-        Messagebox.show_error(f"Invalid input: {e}")
\ No newline at end of file
+        if on_invalid is not None:
+            on_invalid(e)
+            return
+        from ttkbootstrap.dialogs import Messagebox  # keep logic importable without the GUI toolkit
+        Messagebox.show_error(f"Invalid input: {e}")
+        return
+    calculator.submit(inputs)
@@ -1,4 +1,14 @@
+import sys
 from gui import build_gui
 
 if __name__ == "__main__":
-    build_gui()
+    if "--profile" in sys.argv:
+        # python main.py --profile: cProfile the session and print per-stage timings on exit
+        import instrumentation
+        with instrumentation.profiled("leave_calculator.pstats"):
+            build_gui()
+        print(instrumentation.report())
+        instrumentation.print_profile("leave_calculator.pstats", stream=sys.stdout)
+        print("cProfile output written to leave_calculator.pstats")
+    else:
+        build_gui()
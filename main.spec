@@ -5,12 +5,15 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[],
-    hiddenimports=[],
+    datas=[('data/bank-holidays.json', 'data')],
+    hiddenimports=['roster_tab'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # reportlab is only used by the unused export.py, tkcalendar only by archive/,
+    # and pyarrow only by columnar batch output. NumPy and openpyxl are needed
+    # by the roster tab.
+    excludes=['reportlab', 'tkcalendar', 'pyarrow'],
     noarchive=False,
     optimize=0,
 )
@@ -1,43 +1,61 @@
+import csv
+import json
 import tempfile
-import os
 import webbrowser
 from tkinter import filedialog
-from fpdf import FPDF
+import instrumentation
+from formatting import RESULT_COLUMNS, format_summary, pdf_lines, result_row, result_to_dict
 
-def export_to_csv(output_box):
-    content = output_box.get("1.0", "end").strip()
-    if not content:
+def export_to_csv(result):
+    if result is None:
         return
 
     file_path = filedialog.asksaveasfilename(defaultextension=".csv",
                                              filetypes=[("CSV files", "*.csv")],
                                              title="Save as CSV")
     if file_path:
-        with open(file_path, "w", encoding="utf-8") as f:
-            for line in content.splitlines():
-                f.write(line.replace(":", ",") + "\n")
+        with instrumentation.span("export.csv"), open(file_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+            writer.writeheader()
+            writer.writerow(result_row(result))
 
-def export_to_pdf(output_box):
-    content = output_box.get("1.0", "end").strip()
-    if not content:
+def export_to_json(result):
+    if result is None:
+        return
+
+    file_path = filedialog.asksaveasfilename(defaultextension=".json",
+                                             filetypes=[("JSON files", "*.json")],
+                                             title="Save as JSON")
+    if file_path:
+        with instrumentation.span("export.json"), open(file_path, "w", encoding="utf-8") as f:
+            json.dump(result_to_dict(result), f, indent=2)
+
+def export_to_pdf(result):
+    if result is None:
         return
 
     file_path = filedialog.asksaveasfilename(defaultextension=".pdf",
                                              filetypes=[("PDF files", "*.pdf")],
                                              title="Save as PDF")
     if file_path:
-        pdf = FPDF()
-        pdf.set_auto_page_break(auto=True, margin=15)
-        pdf.add_page()
-        pdf.set_font("Arial", size=10)
+        with instrumentation.span("export.pdf"):
+            from fpdf import FPDF  # deferred: fpdf is only needed once a PDF is exported
 
-        for line in content.splitlines():
-            pdf.cell(0, 10, txt=line, ln=True)
+            pdf = FPDF()
+            pdf.set_auto_page_break(auto=True, margin=15)
+            pdf.add_page()
+            pdf.set_font("Arial", size=10)
 
-        pdf.output(file_path)
+            for line in pdf_lines(result):
+                pdf.cell(0, 10, txt=line, ln=True)
+
+            pdf.output(file_path)
+
+def print_summary(result):
+    if result is None:
+        return
 
-def print_summary():
     temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".txt")
-    temp_file.write(b"Annual Leave Summary\n\n")
+    temp_file.write(format_summary(result).encode("utf-8"))
     temp_file.close()
-    webbrowser.open(temp_file.name)
\ No newline at end of file
+    webbrowser.open(temp_file.name)
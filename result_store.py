@@ -0,0 +1,114 @@
+import hashlib
+import json
+import sqlite3
+from datetime import date
+from calculations import RULES_VERSION
+from logic import LeaveResult
+
+# SQLite can bind at most 999 parameters per statement on older builds
+LOOKUP_BATCH = 500
+
+DATE_FIELDS = {"hire_date", "start_date", "end_date"}
+
+
+def input_hash(inputs):
+    # Hash of one parsed batch row plus the rules version, so changing either
+    # marks the stored result as dirty.
+    key = (
+        RULES_VERSION,
+        inputs["emp_number"],
+        inputs["hire_date"].isoformat(),
+        inputs["start_date"].isoformat(),
+        inputs["end_date"].isoformat(),
+        inputs["contracted_hours"],
+        inputs["region"],
+        [(effective.isoformat(), hours) for effective, hours in inputs.get("hours_changes", ())],
+    )
+    return hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+
+
+def encode_result(result):
+    values = []
+    for name in LeaveResult.__slots__:
+        value = getattr(result, name)
+        if name in DATE_FIELDS:
+            value = value.isoformat()
+        elif name == "hours_changes":
+            value = [(effective.isoformat(), hours) for effective, hours in value]
+        values.append(value)
+    return json.dumps(values)
+
+
+def decode_result(text):
+    fields = dict(zip(LeaveResult.__slots__, json.loads(text)))
+    for name in DATE_FIELDS:
+        fields[name] = date.fromisoformat(fields[name])
+    fields["hours_changes"] = tuple((date.fromisoformat(effective), hours)
+                                    for effective, hours in fields["hours_changes"])
+    return LeaveResult(**fields)
+
+
+class ResultStore:
+    # Results of previous batch runs, keyed by (employee, leave year) and
+    # tagged with the input hash and bank holiday data version they were
+    # computed from.
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " employee TEXT NOT NULL,"
+            " leave_year INTEGER NOT NULL,"
+            " input_hash TEXT NOT NULL,"
+            " data_version TEXT NOT NULL,"
+            " result TEXT NOT NULL,"
+            " PRIMARY KEY (employee, leave_year))"
+        )
+        self._db.commit()
+
+    def lookup(self, keys):
+        # keys: iterable of (employee, leave_year) -> {key: (input_hash, data_version, result_text)}
+        keys = set(keys)
+        employees = sorted({employee for employee, _ in keys})
+        found = {}
+        for i in range(0, len(employees), LOOKUP_BATCH):
+            batch = employees[i:i + LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            for employee, year, digest, version, text in self._db.execute(
+                    "SELECT employee, leave_year, input_hash, data_version, result FROM results"
+                    f" WHERE employee IN ({placeholders})", batch):
+                if (employee, year) in keys:
+                    found[(employee, year)] = (digest, version, text)
+        return found
+
+    def missing(self, seen, years, keep=()):
+        # The stored (employee, leave_year) keys for these leave years that
+        # are not in seen and whose employee is not in keep, sorted
+        years = sorted(set(years))
+        if not years:
+            return []
+        placeholders = ",".join("?" * len(years))
+        return sorted(key for key in self._db.execute(
+            f"SELECT employee, leave_year FROM results WHERE leave_year IN ({placeholders})", years)
+            if key not in seen and key[0] not in keep)
+
+    def remove(self, keys):
+        self._db.executemany("DELETE FROM results WHERE employee = ? AND leave_year = ?", keys)
+        self._db.commit()
+
+    def save(self, entries):
+        # entries: iterable of (input_hash, data_version, result)
+        self._db.executemany(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+            [(r.emp_number, r.leave_year, digest, version, encode_result(r)) for digest, version, r in entries],
+        )
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
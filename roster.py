@@ -0,0 +1,174 @@
+import queue
+import threading
+import numpy as np
+from batch import calculate_batch, read_rows
+from calculations import REGION_NAMES
+
+# Data side of the roster tab: the computed results of a whole workforce
+# file, and the filtered and sorted order the table shows them in. Sort keys
+# and filters are NumPy columns, so re-sorting 50k employees is one argsort
+# and the table only ever formats the rows on screen.
+
+ROSTER_COLUMNS = [
+    # (id, heading, width)
+    ("employee", "Employee", 110),
+    ("region", "Region", 130),
+    ("leave_year", "Year", 60),
+    ("contracted_hours", "Hours/wk", 80),
+    ("basic", "Basic", 80),
+    ("long_service", "Long service", 95),
+    ("total", "Total", 80),
+]
+
+PUBLISH_ROWS = 2000   # results handed to the GUI per progress update
+
+
+class RosterModel:
+    def __init__(self):
+        self.results = []
+        self.order = np.empty(0, dtype=np.int64)   # positions in results, as shown
+        self.sort_column = None
+        self.descending = False
+        self.region = None             # slug, or None for every region
+        self.min_total = None
+        self.long_service_only = False
+        self._columns = None
+
+    def __len__(self):
+        return len(self.order)
+
+    def clear(self):
+        self.results = []
+        self._columns = None
+        self.refresh()
+
+    def extend(self, results):
+        # Only the new block is converted to arrays; earlier rows are just copied
+        block = _columns(results)
+        if self._columns is None:
+            self._columns = block
+        else:
+            self._columns = {name: np.concatenate([self._columns[name], values])
+                             for name, values in block.items()}
+        self.results.extend(results)
+        self.refresh()
+
+    def set_filter(self, region=None, min_total=None, long_service_only=False):
+        self.region = region
+        self.min_total = min_total
+        self.long_service_only = long_service_only
+        self.refresh()
+
+    def sort_by(self, column):
+        # Clicking the same column again reverses the order
+        if column == self.sort_column:
+            self.descending = not self.descending
+        else:
+            self.sort_column, self.descending = column, False
+        self.refresh()
+
+    def refresh(self):
+        if not self.results:
+            self.order = np.empty(0, dtype=np.int64)
+            return
+        columns = self._columns
+        mask = np.ones(len(self.results), dtype=bool)
+        if self.region:
+            mask &= columns["region"] == self.region
+        if self.min_total is not None:
+            mask &= columns["total"] >= self.min_total
+        if self.long_service_only:
+            mask &= columns["blocks"] > 0
+        order = np.flatnonzero(mask)
+        if self.sort_column is not None:
+            order = order[np.argsort(columns[self.sort_column][order], kind="stable")]
+            if self.descending:
+                order = order[::-1]
+        self.order = order
+
+    def result(self, position):
+        return self.results[self.order[position]]
+
+    def position_of(self, index):
+        # Where results[index] is shown, or None if it is filtered out
+        found = np.flatnonzero(self.order == index)
+        return int(found[0]) if found.size else None
+
+    def row(self, position):
+        r = self.result(position)
+        return (
+            r.emp_number,
+            REGION_NAMES.get(r.region, r.region),
+            r.leave_year,
+            r.contracted_hours,
+            f"{r.prorated_entitlement:.2f}",
+            f"{r.long_service_award:.2f}",
+            f"{r.total_entitlement:.2f}",
+        )
+
+
+def _columns(results):
+    return {
+        "employee": np.array([r.emp_number for r in results], dtype=str),
+        "region": np.array([r.region for r in results], dtype=str),
+        "leave_year": np.array([r.leave_year for r in results], dtype=np.int64),
+        "contracted_hours": np.array([r.contracted_hours for r in results], dtype=np.float64),
+        "basic": np.array([r.prorated_entitlement for r in results], dtype=np.float64),
+        "long_service": np.array([r.long_service_award for r in results], dtype=np.float64),
+        "total": np.array([r.total_entitlement for r in results], dtype=np.float64),
+        "blocks": np.array([r.long_service_blocks for r in results], dtype=np.int64),
+    }
+
+
+def count_rows(path):
+    # Data rows in a roster file, for the progress bar
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        try:
+            return max(0, (workbook.active.max_row or 1) - 1)
+        finally:
+            workbook.close()
+    with open(path, "rb") as f:
+        return max(0, sum(1 for _ in f) - 1)
+
+
+class RosterLoader:
+    # Computes a roster file on a worker thread. Results reach the Tk thread
+    # in blocks through poll(), which returns ("rows", results, done, total),
+    # ("finished", rejected) or ("error", exception) messages.
+    def __init__(self, path):
+        self.path = path
+        self.rejected = []
+        self._messages = queue.Queue()
+        self._cancelled = threading.Event()
+        threading.Thread(target=self._work, daemon=True).start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def poll(self):
+        messages = []
+        while True:
+            try:
+                messages.append(self._messages.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def _work(self):
+        try:
+            total = count_rows(self.path)
+            block, done = [], 0
+            for result in calculate_batch(read_rows(self.path), rejected=self.rejected):
+                if self._cancelled.is_set():
+                    return
+                block.append(result)
+                if len(block) >= PUBLISH_ROWS:
+                    done += len(block)
+                    self._messages.put(("rows", block, done, total))
+                    block = []
+            done += len(block)
+            self._messages.put(("rows", block, done, total))
+            self._messages.put(("finished", self.rejected))
+        except Exception as e:
+            self._messages.put(("error", e))
@@ -0,0 +1,238 @@
+import ttkbootstrap as tb
+from ttkbootstrap.constants import *
+from ttkbootstrap.dialogs import Messagebox
+from tkinter import filedialog
+from calculations import REGIONS
+from formatting import format_summary
+from roster import ROSTER_COLUMNS, RosterLoader, RosterModel
+from logic import POLL_MS
+
+ALL_REGIONS = "All regions"
+ROW_HEIGHT = 20   # used when the theme does not set a Treeview row height
+
+
+class VirtualTable:
+    # A Treeview that holds only the rows on screen. Scrolling moves an
+    # offset into the model and rewrites the values of those few items, so
+    # the cost of a scroll does not depend on how many employees are loaded.
+    def __init__(self, parent, model, on_select):
+        self.model = model
+        self.on_select = on_select
+        self.offset = 0
+        self.visible = 20
+        self.selected = None   # index into model.results, kept across sorts
+
+        frame = tb.Frame(parent)
+        frame.pack(fill=BOTH, expand=True)
+        self.tree = tb.Treeview(frame, columns=[c for c, _, _ in ROSTER_COLUMNS], show="headings",
+                                selectmode="browse", height=self.visible, bootstyle="info")
+        for column, heading, width in ROSTER_COLUMNS:
+            self.tree.heading(column, text=heading, command=lambda c=column: self.sort(c))
+            self.tree.column(column, width=width, anchor=W if column in ("employee", "region") else E)
+        self.scrollbar = tb.Scrollbar(frame, orient=VERTICAL, command=self._scrollbar)
+        self.scrollbar.pack(side=RIGHT, fill=Y)
+        self.tree.pack(side=LEFT, fill=BOTH, expand=True)
+
+        self.tree.bind("<Configure>", self._resize)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(1, "units"))
+        self.tree.bind("<Up>", lambda e: self._step(-1))
+        self.tree.bind("<Down>", lambda e: self._step(1))
+        self.tree.bind("<Prior>", lambda e: self._step(-self.visible))
+        self.tree.bind("<Next>", lambda e: self._step(self.visible))
+        self.tree.bind("<<TreeviewSelect>>", self._selected)
+
+    def _row_height(self):
+        style = self.tree.cget("style") or "Treeview"
+        try:
+            return int(tb.Style().lookup(style, "rowheight") or ROW_HEIGHT)
+        except ValueError:
+            return ROW_HEIGHT
+
+    def _resize(self, event):
+        height = self._row_height()
+        rows = max(1, (event.height - height) // height)   # less the heading row
+        if rows != self.visible:
+            self.visible = rows
+            self.render()
+
+    def _scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.offset = int(float(amount) * len(self.model))
+            self.render()
+        else:
+            self.scroll(int(amount), unit)
+
+    def scroll(self, amount, unit="units"):
+        self.offset += amount * (self.visible if unit == "pages" else 3)
+        self.render()
+        return "break"
+
+    def _step(self, amount):
+        # Keyboard navigation moves the selection and scrolls to keep it on screen
+        count = len(self.model)
+        if not count:
+            return "break"
+        current = self.model.position_of(self.selected) if self.selected is not None else None
+        position = 0 if current is None else min(max(current + amount, 0), count - 1)
+        if position < self.offset:
+            self.offset = position
+        elif position >= self.offset + self.visible:
+            self.offset = position - self.visible + 1
+        self.select(position)
+        return "break"
+
+    def render(self):
+        count = len(self.model)
+        self.offset = max(0, min(self.offset, count - self.visible))
+        shown = min(self.visible, count - self.offset)
+        items = self.tree.get_children()
+        if len(items) > shown:
+            self.tree.delete(*items[shown:])
+        for slot in range(len(items), shown):
+            self.tree.insert("", END, iid=str(slot))
+        for slot in range(shown):
+            self.tree.item(str(slot), values=self.model.row(self.offset + slot))
+        if count:
+            self.scrollbar.set(self.offset / count, (self.offset + shown) / count)
+        else:
+            self.scrollbar.set(0, 1)
+        self._highlight()
+
+    def _highlight(self):
+        position = self.model.position_of(self.selected) if self.selected is not None else None
+        slot = None if position is None else position - self.offset
+        if slot is not None and 0 <= slot < self.visible and self.tree.exists(str(slot)):
+            if self.tree.selection() != (str(slot),):
+                self.tree.selection_set(str(slot))
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+    def select(self, position):
+        self.selected = int(self.model.order[position])
+        self.render()
+        self.on_select(self.model.result(position))
+
+    def _selected(self, event):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        position = self.offset + int(selection[0])
+        index = int(self.model.order[position]) if position < len(self.model) else None
+        if index is not None and index != self.selected:
+            self.selected = index
+            self.on_select(self.model.result(position))
+
+    def sort(self, column):
+        self.model.sort_by(column)
+        for c, heading, _ in ROSTER_COLUMNS:
+            arrow = (" ▼" if self.model.descending else " ▲") if c == self.model.sort_column else ""
+            self.tree.heading(c, text=heading + arrow)
+        self.render()
+
+
+def build_roster_tab(tab, root):
+    model = RosterModel()
+    state = {"loader": None}
+
+    toolbar = tb.Frame(tab)
+    toolbar.pack(fill=X, pady=(0, 10))
+    tb.Button(toolbar, text="📂 Open roster…", bootstyle=PRIMARY,
+              command=lambda: open_roster()).pack(side=LEFT)
+    region_var = tb.StringVar(value=ALL_REGIONS)
+    tb.Label(toolbar, text="Region").pack(side=LEFT, padx=(20, 5))
+    tb.Combobox(toolbar, textvariable=region_var, values=[ALL_REGIONS] + list(REGIONS),
+                state="readonly", width=18, bootstyle="info").pack(side=LEFT)
+    min_total_var = tb.StringVar()
+    tb.Label(toolbar, text="Total ≥").pack(side=LEFT, padx=(20, 5))
+    tb.Entry(toolbar, textvariable=min_total_var, width=8, bootstyle="info").pack(side=LEFT)
+    long_service_var = tb.BooleanVar(value=False)
+    tb.Checkbutton(toolbar, text="Long service only", variable=long_service_var,
+                   bootstyle="info-round-toggle").pack(side=LEFT, padx=20)
+    count_label = tb.Label(toolbar, text="No roster loaded")
+    count_label.pack(side=RIGHT)
+
+    progress = tb.Progressbar(tab, mode="determinate", bootstyle="info-striped")
+
+    panes = tb.Panedwindow(tab, orient=HORIZONTAL)
+    panes.pack(fill=BOTH, expand=True)
+    table_frame = tb.Frame(panes)
+    detail = tb.Text(panes, wrap="word", font=("Consolas", 10), width=60)
+    panes.add(table_frame, weight=3)
+    panes.add(detail, weight=2)
+
+    def show_detail(result):
+        # The full summary is only formatted for the row the user selects
+        detail.delete("1.0", "end")
+        detail.insert("end", format_summary(result))
+
+    table = VirtualTable(table_frame, model, show_detail)
+
+    def update_count():
+        if model.results:
+            count_label.configure(text=f"Showing {len(model):,} of {len(model.results):,} employees")
+
+    def apply_filter(*args):
+        text = min_total_var.get().strip()
+        try:
+            min_total = float(text) if text else None
+        except ValueError:
+            return  # wait until the number is complete
+        region = REGIONS.get(region_var.get())
+        model.set_filter(region, min_total, long_service_var.get())
+        table.offset = 0
+        table.render()
+        update_count()
+
+    for var in (region_var, min_total_var, long_service_var):
+        var.trace_add("write", apply_filter)
+
+    def open_roster():
+        path = filedialog.askopenfilename(title="Open roster",
+                                          filetypes=[("Roster files", "*.csv *.xlsx *.xlsm"),
+                                                     ("All files", "*.*")])
+        if not path:
+            return
+        if state["loader"] is not None:
+            state["loader"].cancel()
+        model.clear()
+        table.selected = None
+        table.offset = 0
+        table.render()
+        detail.delete("1.0", "end")
+        count_label.configure(text="Loading…")
+        progress.configure(value=0, maximum=1)
+        progress.pack(fill=X, pady=(0, 10), before=panes)
+        state["loader"] = RosterLoader(path)
+        root.after(POLL_MS, lambda: poll(state["loader"]))
+
+    def poll(loader):
+        if loader is not state["loader"]:
+            return  # a newer roster replaced this one
+        for message in loader.poll():
+            if message[0] == "rows":
+                _, results, done, total = message
+                model.extend(results)
+                progress.configure(value=done, maximum=max(total, done, 1))
+                table.render()
+                update_count()
+            elif message[0] == "finished":
+                progress.pack_forget()
+                state["loader"] = None
+                update_count()
+                rejected = message[1]
+                if rejected:
+                    rows = len({line for line, _, _ in rejected})
+                    first = "\n".join(f"Row {line}: {field}: {reason}" for line, field, reason in rejected[:5])
+                    Messagebox.show_warning(f"Skipped {rows} invalid row(s):\n{first}", title="Roster")
+                return
+            else:
+                progress.pack_forget()
+                state["loader"] = None
+                count_label.configure(text="No roster loaded")
+                Messagebox.show_error(f"Could not load roster: {message[1]}", title="Roster")
+                return
+        root.after(POLL_MS, lambda: poll(loader))
+
+    return tab
@@ -0,0 +1,201 @@
+import argparse
+import os
+import sys
+from itertools import islice
+import numpy as np
+import instrumentation
+import leave_calendar
+from batch import read_rows, write_error_report
+from calculations import REGIONS, get_bank_holiday_index, region_slug
+from kernels import calculate_entitlements_array, calculate_long_service_array
+from validation import employee_number, parse_date_column, parse_hours_column
+from writers import GridWriter
+
+# Workforce planning: every employee's entitlement for each leave year and
+# each bank holiday region, computed as (employee, year, region) arrays in
+# one pass. A leave year runs from 1 January, or from the hire date in the
+# year of hire, to 31 December; years before the hire year have no leave
+# days and are all zero. A cell equals a batch row for that employee and
+# region with that leave period.
+
+CHUNK_SIZE = 20000
+
+
+class ScenarioGrid:
+    # Values are indexed [employee, year, region]; leave days, base and long
+    # service hours do not depend on the region, so they are [employee, year].
+    def __init__(self, employees, years, regions, contracted_hours, bank_holidays, leave_days,
+                 base, bank_holiday, basic, long_service, blocks):
+        self.employees = employees
+        self.years = years
+        self.regions = regions
+        self.contracted_hours = contracted_hours
+        self.bank_holidays = bank_holidays        # [year, region]
+        self.leave_days = leave_days
+        self.base = base
+        self.bank_holiday = bank_holiday
+        self.basic = basic
+        self.long_service = long_service
+        self.blocks = blocks
+
+    @property
+    def shape(self):
+        return (len(self.employees), len(self.years), len(self.regions))
+
+    @property
+    def total(self):
+        return self.basic + self.long_service[:, :, None]
+
+    def columns(self):
+        # Long format, one row per (employee, year, region) cell
+        employees, years, regions = self.shape
+        return {
+            "employee": np.repeat(self.employees, years * regions),
+            "year": np.tile(np.repeat(self.years, regions), employees),
+            "region": np.tile(self.regions, employees * years),
+            "contracted_hours": np.repeat(self.contracted_hours, years * regions),
+            "bank_holidays": np.tile(self.bank_holidays.ravel(), employees),
+            "leave_days": np.repeat(self.leave_days.ravel(), regions),
+            "base_hours": np.repeat(self.base.ravel(), regions),
+            "bank_holiday_hours": self.bank_holiday.ravel(),
+            "basic_hours": self.basic.ravel(),
+            "long_service_hours": np.repeat(self.long_service.ravel(), regions),
+            "total_hours": self.total.ravel(),
+        }
+
+
+def scenario_grid(employees, hire_dates, contracted_hours, years, regions=None, holidays=None):
+    # employees: employee numbers; hire_dates: datetime64[D] or ISO strings;
+    # contracted_hours: floats; years: leave years; regions: slugs or names
+    # (default: every region).
+    if holidays is None:
+        holidays = get_bank_holiday_index()
+    employees = np.asarray(employees, dtype=object)
+    hire_dates = np.asarray(hire_dates, dtype="datetime64[D]")
+    hours = np.asarray(contracted_hours, dtype=np.float64)
+    years = np.asarray(years, dtype=np.int64)
+    regions = np.array([region_slug(r) for r in (regions or REGIONS.values())], dtype=object)
+
+    with instrumentation.span("compute"):
+        # One bank holiday count per (year, region), not per cell
+        bank_holidays = np.array([[holidays.count(int(y), r) for r in regions] for y in years],
+                                 dtype=np.int64).reshape(len(years), len(regions))
+        days_in_year = np.array([leave_calendar.days_in_year(int(y)) for y in years], dtype=np.int64)
+
+        # The leave period starts on the later of 1 January and the hire
+        # date, and is empty for years before the hire year
+        first_days = (years - 1970).astype("datetime64[Y]").astype("datetime64[D]")
+        last_days = (years + 1 - 1970).astype("datetime64[Y]").astype("datetime64[D]") - 1
+        starts = np.maximum(first_days[None, :], hire_dates[:, None])
+        leave_days = np.maximum((last_days[None, :] - starts).astype(np.int64) + 1, 0)
+
+        # A leave year ends on 31 December, on or after that year's service
+        # anniversary, so completed years are year - hire year (never below
+        # 0) and the award boundaries passed are those // long_service_years.
+        hire_years = hire_dates.astype("datetime64[Y]").astype(np.int64) + 1970
+        completed = np.maximum(years[None, :] - hire_years[:, None], 0).astype(np.float64)
+
+        basic, base, bank_holiday = calculate_entitlements_array(
+            hours[:, None, None], leave_days[:, :, None], days_in_year[None, :, None],
+            bank_holidays[None, :, :])
+        long_service, blocks = calculate_long_service_array(
+            hours[:, None], completed, leave_days, days_in_year[None, :])
+    instrumentation.count("scenario_cells", employees.size * years.size * regions.size)
+    return ScenarioGrid(employees, years, regions, hours, bank_holidays, leave_days,
+                        base[:, :, 0], bank_holiday, basic, long_service, blocks)
+
+
+def read_employees(rows, first_line=2):
+    # rows: batch input dicts (leave period and region columns are ignored)
+    # -> (employees, hire_dates, contracted_hours, errors as (line, field, reason))
+    rows = list(rows)
+    employees = np.array([employee_number(row.get("employee")) for row in rows], dtype=object)
+    hire_dates, bad_dates = parse_date_column([row.get("hire_date") for row in rows])
+    hours, bad_hours = parse_hours_column([row.get("contracted_hours") for row in rows])
+    errors = [(first_line + i, "employee", "Employee number is required.")
+              for i in np.flatnonzero(employees == "")]
+    errors += [(first_line + i, "hire_date", reason) for i, reason in bad_dates.items()]
+    errors += [(first_line + i, "contracted_hours", reason) for i, reason in bad_hours.items()]
+    valid = np.ones(len(rows), dtype=bool)
+    valid[[line - first_line for line, _, _ in errors]] = False
+    errors.sort(key=lambda error: error[0])
+    return employees[valid], hire_dates[valid], hours[valid], errors
+
+
+def iter_grids(rows, years, regions=None, holidays=None, chunk_size=CHUNK_SIZE, rejected=None):
+    # Streams the grid a chunk of employees at a time; invalid employees are
+    # appended to rejected, or raise ValueError when rejected is None.
+    if holidays is None:
+        holidays = get_bank_holiday_index()
+    rows = iter(rows)
+    first_line = 2
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        employees, hire_dates, hours, errors = read_employees(chunk, first_line)
+        if errors and rejected is None:
+            line, field, reason = errors[0]
+            raise ValueError(f"Row {line}: {field}: {reason}")
+        if errors:
+            rejected.extend(errors)
+        first_line += len(chunk)
+        yield scenario_grid(employees, hire_dates, hours, years, regions, holidays)
+
+
+def parse_years(text):
+    # "2026-2030" or "2026,2028"
+    years = []
+    for part in text.split(","):
+        first, sep, last = part.strip().partition("-")
+        first, last = int(first), int(last if sep else first)
+        if last < first:
+            raise ValueError(f"Year range {part.strip()!r} runs backwards")
+        years.extend(range(first, last + 1))
+    return years
+
+
+def _years_arg(text):
+    try:
+        return parse_years(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m scenarios",
+        description="Entitlement of every employee for each leave year and bank holiday region.")
+    parser.add_argument("input", help="employee CSV or XLSX file (employee, hire_date, contracted_hours)")
+    parser.add_argument("--years", required=True, type=_years_arg, help="leave years, e.g. 2026-2030")
+    parser.add_argument("--regions", nargs="+", metavar="REGION",
+                        help="region slugs or names (default: all regions)")
+    parser.add_argument("-o", "--output", required=True, help="output .csv, .parquet or .arrow file")
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"],
+                        help="output format (default: from the output file extension)")
+    parser.add_argument("--errors", metavar="PATH",
+                        help="write rejected rows to this CSV as row, field, reason")
+    args = parser.parse_args(argv)
+
+    rejected = []
+    employees = 0
+    try:
+        with GridWriter(args.output, args.format) as writer:
+            for grid in iter_grids(read_rows(args.input), args.years, args.regions, rejected=rejected):
+                writer.write(grid)
+                employees += len(grid.employees)
+    except ValueError as e:
+        parser.exit(1, f"error: {e}\n")
+    print(f"Wrote {writer.count} scenario row(s) for {employees} employee(s) to "
+          f"{os.path.abspath(args.output)}", file=sys.stderr)
+    if rejected:
+        rows = len({line for line, _, _ in rejected})
+        if args.errors:
+            write_error_report(args.errors, rejected)
+        print(f"Skipped {rows} invalid row(s)" + (f"; see {os.path.abspath(args.errors)}" if args.errors else ""),
+              file=sys.stderr)
+        parser.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import argparse
+import json
+import sys
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+from bank_holidays import BankHolidayError, BankHolidayStore, default_store
+from batch import calculate_chunk, parse_row
+from formatting import result_to_dict
+from logic import compute_leave
+from validation import validate_rows
+
+# Local JSON API for tools that need entitlements without the GUI:
+#   GET  /health           -> {"status": "ok", "bank_holidays": {...}}
+#   POST /calculate        -> one employee (batch input fields) -> result
+#   POST /calculate/bulk   -> {"employees": [...]} -> {"results": [...], "errors": [...]}
+
+MAX_BODY = 16 * 1024 * 1024
+STATUS = {200: "200 OK", 400: "400 Bad Request", 404: "404 Not Found",
+          405: "405 Method Not Allowed", 413: "413 Payload Too Large",
+          503: "503 Service Unavailable"}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Batch input fields that take one string or number each
+SCALAR_FIELDS = ("employee", "emp_number", "hire_date", "contracted_hours", "region",
+                 "start_date", "end_date", "leave_year")
+SCALAR_ERROR = "Expected a single string or number."
+CHANGES_ERROR = 'Expected the batch string form or a list of {"effective_date", "hours"} objects.'
+
+
+def _scalar(value):
+    return not isinstance(value, (list, dict, bool))
+
+
+def _row(item):
+    # JSON employee -> (batch input row, [(field, reason)]); hours_changes may
+    # be the batch string form or a list of {"effective_date", "hours"} objects.
+    if not isinstance(item, dict):
+        raise ValueError("Each employee must be a JSON object.")
+    row = dict(item)
+    errors = [(field, SCALAR_ERROR) for field in SCALAR_FIELDS if not _scalar(row.get(field))]
+    if "employee" not in row:
+        row["employee"] = row.get("emp_number", "")
+    changes = row.get("hours_changes")
+    if isinstance(changes, list):
+        if all(isinstance(c, dict) and "effective_date" in c and "hours" in c
+               and _scalar(c["effective_date"]) and _scalar(c["hours"]) for c in changes):
+            row["hours_changes"] = "; ".join(f"{c['effective_date']}={c['hours']}" for c in changes)
+        else:
+            errors.append(("hours_changes", CHANGES_ERROR))
+    elif not _scalar(changes):
+        errors.append(("hours_changes", CHANGES_ERROR))
+    return row, errors
+
+
+class LeaveService:
+    def __init__(self, store=None):
+        self.store = store or default_store()
+
+    def holidays(self):
+        # Every request thread shares one store, which refreshes a stale cache
+        # once while the other requests wait for the result
+        return self.store.index()
+
+    def __call__(self, environ, start_response):
+        try:
+            status, body = self.route(environ)
+        except RequestError as e:
+            status, body = e.status, {"error": str(e)}
+        except BankHolidayError as e:
+            status, body = 503, {"error": str(e)}
+        payload = json.dumps(body).encode("utf-8")
+        start_response(STATUS[status], [("Content-Type", "application/json"),
+                                        ("Content-Length", str(len(payload)))])
+        return [payload]
+
+    def route(self, environ):
+        path = environ.get("PATH_INFO", "").rstrip("/")
+        method = environ["REQUEST_METHOD"]
+        if path == "/health":
+            index = self.holidays()
+            return 200, {"status": "ok",
+                         "bank_holidays": {"version": index.version, "source": self.store.source}}
+        if path not in ("/calculate", "/calculate/bulk"):
+            raise RequestError(404, f"No such endpoint: {path or '/'}")
+        if method != "POST":
+            raise RequestError(405, f"{path} only accepts POST")
+        body = self.read_json(environ)
+        if path == "/calculate":
+            return 200, self.calculate(body)
+        return 200, self.calculate_bulk(body)
+
+    def read_json(self, environ):
+        try:
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+        if length > MAX_BODY:
+            raise RequestError(413, f"Request body is larger than {MAX_BODY} bytes")
+        try:
+            return json.loads(environ["wsgi.input"].read(length) or b"null")
+        except ValueError as e:
+            raise RequestError(400, f"Invalid JSON: {e}") from e
+
+    def calculate(self, item):
+        try:
+            row, errors = _row(item)
+            if errors:
+                raise ValueError("; ".join(f"{field}: {reason}" for field, reason in errors))
+            inputs = parse_row(row)
+        except (KeyError, TypeError, ValueError) as e:
+            raise RequestError(400, f"Invalid input: {e}") from e
+        return result_to_dict(compute_leave(**inputs, holidays=self.holidays()))
+
+    def calculate_bulk(self, body):
+        employees = body.get("employees") if isinstance(body, dict) else body
+        if not isinstance(employees, list):
+            raise RequestError(400, 'Expected {"employees": [...]}')
+        rows, positions, errors = [], [], []
+        for i, item in enumerate(employees):
+            try:
+                row, problems = _row(item)
+            except ValueError as e:
+                errors.append({"index": i, "field": None, "error": str(e)})
+                continue
+            if problems:
+                errors.extend({"index": i, "field": field, "error": reason} for field, reason in problems)
+                continue
+            rows.append(row)
+            positions.append(i)
+        inputs, valid, rejected = validate_rows(rows, first_line=0)
+        errors.extend({"index": positions[i], "field": field, "error": reason}
+                      for i, field, reason in rejected)
+        errors.sort(key=lambda error: error["index"])
+        results = calculate_chunk(inputs, self.holidays()) if inputs else []
+        indices = [positions[i] for i in valid.nonzero()[0]]
+        return {"results": [dict(result_to_dict(r), index=i) for i, r in zip(indices, results)],
+                "errors": errors}
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128   # the default backlog of 5 resets bursts of clients
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def make_service(host="127.0.0.1", port=8080, store=None, quiet=True):
+    handler = QuietHandler if quiet else WSGIRequestHandler
+    return make_server(host, port, LeaveService(store), server_class=ThreadingWSGIServer,
+                       handler_class=handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m service",
+                                     description="Serve leave calculations as a local JSON API.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on (default: 8080)")
+    parser.add_argument("--feed-url", help="bank holiday feed to use instead of gov.uk, e.g. a local stub")
+    parser.add_argument("--log", action="store_true", help="log every request to stderr")
+    args = parser.parse_args(argv)
+
+    store = BankHolidayStore(url=args.feed_url) if args.feed_url else None
+    server = make_service(args.host, args.port, store, quiet=not args.log)
+    try:
+        server.application.holidays()  # load the feed before the first request
+    except BankHolidayError as e:
+        print(f"warning: {e}", file=sys.stderr)
+    print(f"Serving on http://{args.host}:{server.server_port}/ (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
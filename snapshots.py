@@ -0,0 +1,297 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import date
+import numpy as np
+import instrumentation
+from calculations import RULES_VERSION
+from logic import LeaveResult
+from writers import FLUSH_ROWS, write_results
+
+# Saved batch runs for audit. A snapshot is a directory of fixed-width
+# NumPy columns (one .npy file per LeaveResult field) and a manifest.json
+# recording the rules version and the bank holiday data the run used.
+# Columns are memory-mapped on open, so reopening a 100k-employee run reads
+# only the manifest and the .npy headers; nothing is recalculated.
+
+SNAPSHOT_VERSION = 1
+MANIFEST = "manifest.json"
+
+# LeaveResult field -> column dtype; str columns are sized to their longest value
+SNAPSHOT_COLUMNS = {
+    "emp_number": str,
+    "hire_date": "datetime64[D]",
+    "start_date": "datetime64[D]",
+    "end_date": "datetime64[D]",
+    "region": str,
+    "leave_year": np.int16,  # validated to 9998 at most
+    "contracted_hours": np.float64,
+    "days_employed": np.int32,
+    "years_employed": np.float64,
+    "leave_days": np.int32,
+    "bank_holiday_count": np.int32,
+    "prorated_entitlement": np.float64,
+    "prorated_base": np.float64,
+    "prorated_bh": np.float64,
+    "long_service_award": np.float64,
+    "long_service_blocks": np.int32,
+    "total_entitlement": np.float64,
+    "hours_changes": str,    # "2025-06-01=22.5; 2025-09-01=30", as in batch input
+}
+
+# The columns rows are matched on, so never reported as changed
+DIFF_IGNORED = {"emp_number", "leave_year"}
+KEY_SEPARATOR = "\x1f"
+
+
+def _encode_changes(changes):
+    return "; ".join(f"{effective.isoformat()}={hours:g}" for effective, hours in changes)
+
+
+def _decode_changes(text):
+    changes = []
+    for item in text.split(";"):
+        if item.strip():
+            effective, _, hours = item.partition("=")
+            changes.append((date.fromisoformat(effective.strip()), float(hours)))
+    return tuple(changes)
+
+
+class SnapshotWriter:
+    # Same write/close interface as the result writers. Each block of results
+    # is appended to one raw .part file per column as it arrives, so memory
+    # stays at one block however long the run; close() writes the .npy files
+    # from them. str columns are widened to their longest value then.
+    def __init__(self, path, holidays, source=None, flush_rows=FLUSH_ROWS):
+        self.path = path
+        self.holidays = holidays
+        self.source = source
+        self.flush_rows = flush_rows
+        self.count = 0
+        self._buffer = []
+        self._blocks = {name: [] for name in SNAPSHOT_COLUMNS}   # (rows, dtype) per block
+        self._regions = set()   # (region, leave year) pairs in the run
+        os.makedirs(path, exist_ok=True)
+        manifest_path = os.path.join(path, MANIFEST)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)   # the snapshot is incomplete until the manifest is back
+        self._parts = {name: open(self._column_path(name) + ".part", "wb") for name in SNAPSHOT_COLUMNS}
+
+    def _column_path(self, name):
+        return os.path.join(self.path, f"{name}.npy")
+
+    def write(self, result):
+        self._buffer.append(result)
+        if len(self._buffer) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        with instrumentation.span("export.snapshot"):
+            columns = {}
+            for name, kind in SNAPSHOT_COLUMNS.items():
+                values = [getattr(r, name) for r in self._buffer]
+                if name == "hours_changes":
+                    values = [_encode_changes(v) for v in values]
+                columns[name] = np.array(values, dtype=kind)
+                columns[name].tofile(self._parts[name])
+                self._blocks[name].append((len(values), columns[name].dtype))
+            self._regions.update(zip(columns["region"].tolist(), columns["leave_year"].tolist()))
+        self.count += len(self._buffer)
+        self._buffer.clear()
+
+    def close(self):
+        if self._parts is None:
+            return
+        self.flush()
+        with instrumentation.span("export.snapshot"):
+            columns = {}
+            for name, kind in SNAPSHOT_COLUMNS.items():
+                self._parts[name].close()
+                columns[name] = self._write_column(name, kind).str
+            manifest = {
+                "version": SNAPSHOT_VERSION,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "source": os.path.abspath(self.source) if self.source else None,
+                "rows": self.count,
+                "rules_version": RULES_VERSION,
+                "bank_holidays": {"version": self.holidays.version,
+                                  "dates": self._bank_holiday_dates()},
+                "columns": columns,
+            }
+            with open(os.path.join(self.path, MANIFEST), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=1)
+        self._parts = None
+
+    def _write_column(self, name, kind):
+        # .npy header, then the .part blocks copied across one at a time
+        blocks = self._blocks[name]
+        dtype = np.result_type(*(kind for _, kind in blocks)) if blocks else np.array([], dtype=kind).dtype
+        part_path = self._column_path(name) + ".part"
+        with open(part_path, "rb") as part, open(self._column_path(name), "wb") as f:
+            np.lib.format.write_array_header_1_0(f, {"descr": np.lib.format.dtype_to_descr(dtype),
+                                                     "fortran_order": False, "shape": (self.count,)})
+            for rows, block_dtype in blocks:
+                np.fromfile(part, dtype=block_dtype, count=rows).astype(dtype, copy=False).tofile(f)
+        os.remove(part_path)
+        return dtype
+
+    def _bank_holiday_dates(self):
+        # The dates behind every (region, leave year) in the run, so an
+        # auditor can see exactly which bank holidays were counted
+        dates = {}
+        for region, year in sorted(self._regions):
+            dates.setdefault(region, {})[str(year)] = [d.isoformat() for d in self.holidays.dates(year, region)]
+        return dates
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Snapshot:
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"{path} is not a complete snapshot (no {MANIFEST})") from None
+        if self.manifest.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"{path}: unsupported snapshot version {self.manifest.get('version')!r}")
+        with instrumentation.span("snapshot.open"):
+            self.columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                            for name in self.manifest["columns"]}
+
+    @property
+    def bank_holiday_version(self):
+        return self.manifest["bank_holidays"]["version"]
+
+    def __len__(self):
+        return self.manifest["rows"]
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def result(self, i):
+        fields = {name: values[i].item() for name, values in self.columns.items()}
+        fields["hours_changes"] = _decode_changes(fields["hours_changes"])
+        return LeaveResult(**fields)
+
+    def __iter__(self):
+        # Rebuilds LeaveResults a block at a time, e.g. to re-export a past run
+        for start in range(0, len(self), FLUSH_ROWS):
+            block = {name: values[start:start + FLUSH_ROWS].tolist() for name, values in self.columns.items()}
+            block["hours_changes"] = [_decode_changes(text) for text in block["hours_changes"]]
+            for values in zip(*block.values()):
+                yield LeaveResult(**dict(zip(block, values)))
+
+
+def _keys(snapshot):
+    # (employee, leave year) as one sortable string per row. NumPy strips
+    # trailing NULs from str arrays, so the separator is a unit separator
+    return np.char.add(np.char.add(np.asarray(snapshot["emp_number"]), KEY_SEPARATOR),
+                       np.asarray(snapshot["leave_year"]).astype(str))
+
+
+def _check_unique(keys, name):
+    # intersect1d would match only one row of a repeated key
+    values, counts = np.unique(keys, return_counts=True)
+    repeated = values[counts > 1]
+    if len(repeated):
+        examples = ", ".join(key.replace(KEY_SEPARATOR, " ") for key in repeated[:5].tolist())
+        raise ValueError(f"{name} has {len(repeated)} employee-year(s) on more than one row "
+                         f"(e.g. {examples}); cannot match rows")
+
+
+class SnapshotDiff:
+    # Rows are matched on (employee, leave year), which must be unique in
+    # both snapshots. changed maps a column to (positions in old, positions
+    # in new) of the rows whose values differ.
+    def __init__(self, old, new):
+        self.old = old
+        self.new = new
+        with instrumentation.span("snapshot.diff"):
+            old_keys, new_keys = _keys(old), _keys(new)
+            _check_unique(old_keys, old.path)
+            _check_unique(new_keys, new.path)
+            _, self.old_rows, self.new_rows = np.intersect1d(old_keys, new_keys, return_indices=True)
+            self.removed = np.setdiff1d(np.arange(len(old)), self.old_rows)
+            self.added = np.setdiff1d(np.arange(len(new)), self.new_rows)
+            self.changed = {}
+            for name in SNAPSHOT_COLUMNS:
+                if name in DIFF_IGNORED or name not in old.columns or name not in new.columns:
+                    continue
+                differs = np.asarray(old[name])[self.old_rows] != np.asarray(new[name])[self.new_rows]
+                if differs.any():
+                    self.changed[name] = (self.old_rows[differs], self.new_rows[differs])
+
+    def summary(self):
+        lines = [f"Matched {len(self.old_rows)} employee-year(s); "
+                 f"{len(self.removed)} only in old, {len(self.added)} only in new"]
+        if self.old.bank_holiday_version != self.new.bank_holiday_version:
+            lines.append(f"Bank holiday data: {self.old.bank_holiday_version} -> {self.new.bank_holiday_version}")
+        for name, (old_rows, _) in self.changed.items():
+            lines.append(f"  {name}: {len(old_rows)} changed")
+        if not self.changed:
+            lines.append("  no column values changed")
+        return "\n".join(lines)
+
+    def rows(self):
+        # (employee, leave_year, column, old value, new value) for every change
+        for name, (old_rows, new_rows) in self.changed.items():
+            employees = np.asarray(self.old["emp_number"])[old_rows].tolist()
+            years = np.asarray(self.old["leave_year"])[old_rows].tolist()
+            old_values = np.asarray(self.old[name])[old_rows].tolist()
+            new_values = np.asarray(self.new[name])[new_rows].tolist()
+            yield from zip(employees, years, [name] * len(old_rows), old_values, new_values)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m snapshots",
+        description="Inspect, re-export and compare batch runs saved with python -m batch --snapshot.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    show = commands.add_parser("show", help="print a snapshot's manifest")
+    show.add_argument("snapshot")
+    export = commands.add_parser("export", help="write a snapshot's results without recalculating")
+    export.add_argument("snapshot")
+    export.add_argument("-o", "--output", required=True, help="output .csv, .parquet or .arrow file")
+    diff = commands.add_parser("diff", help="compare two snapshots column by column")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    diff.add_argument("-o", "--output", help="write every changed value to this CSV")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "show":
+            snapshot = Snapshot(args.snapshot)
+            manifest = dict(snapshot.manifest)
+            manifest["bank_holidays"] = {
+                "version": snapshot.bank_holiday_version,
+                "regions": sorted(manifest["bank_holidays"]["dates"]),
+            }
+            print(json.dumps(manifest, indent=1))
+        elif args.command == "export":
+            count = write_results(Snapshot(args.snapshot), args.output)
+            print(f"Wrote {count} employee(s) to {os.path.abspath(args.output)}", file=sys.stderr)
+        else:
+            result = SnapshotDiff(Snapshot(args.old), Snapshot(args.new))
+            print(result.summary())
+            if args.output:
+                with open(args.output, "w", newline="", encoding="utf-8") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(["employee", "leave_year", "field", "old", "new"])
+                    writer.writerows(result.rows())
+    except ValueError as e:
+        parser.exit(1, f"error: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import json
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bank_holidays import BankHolidayIndex, resource_path
+
+
+@pytest.fixture(scope="session")
+def holidays():
+    # The bundled gov.uk snapshot, so the checks never touch the network
+    with open(resource_path("data", "bank-holidays.json"), encoding="utf-8") as f:
+        return BankHolidayIndex(json.load(f))
@@ -0,0 +1,119 @@
+import http.server
+import json
+import threading
+import time
+import pytest
+from bank_holidays import FEED_URL, BankHolidayError, BankHolidayStore, resource_path
+
+SNAPSHOT = resource_path("data", "bank-holidays.json")
+THREADS = 8
+
+
+class StubFeed:
+    # A local feed: serves the bundled snapshot with an ETag, answers 304 to
+    # a matching If-None-Match, and records every request it gets
+    def __init__(self):
+        with open(SNAPSHOT, "rb") as f:
+            self.payload = f.read()
+        self.status = 200
+        self.delay = 0.0
+        self.requests = []   # (If-None-Match header, status sent)
+        feed = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(feed.delay)
+                etag = self.headers.get("If-None-Match")
+                status = 304 if feed.status == 200 and etag == '"v1"' else feed.status
+                feed.requests.append((etag, status))
+                self.send_response(status)
+                self.send_header("ETag", '"v1"')
+                body = feed.payload if status == 200 else b""
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/bank-holidays.json"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def feed():
+    feed = StubFeed()
+    yield feed
+    feed.server.shutdown()
+    feed.server.server_close()
+
+
+def load_together(store):
+    # Every thread calls load() at once -> [data or exception] per thread
+    barrier = threading.Barrier(THREADS)
+    outcomes = [None] * THREADS
+
+    def call(i):
+        barrier.wait()
+        try:
+            outcomes[i] = store.load()
+        except BankHolidayError as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def test_other_feeds_do_not_share_the_gov_uk_cache(tmp_path):
+    default = BankHolidayStore(cache_dir=str(tmp_path))
+    stub = BankHolidayStore(url="http://127.0.0.1:8000/bank-holidays.json", cache_dir=str(tmp_path))
+    other = BankHolidayStore(url="http://127.0.0.1:9000/bank-holidays.json", cache_dir=str(tmp_path))
+    assert default.url == FEED_URL
+    assert len({default.cache_path, stub.cache_path, other.cache_path}) == 3
+
+
+def test_concurrent_cold_callers_make_one_request(feed, tmp_path):
+    feed.delay = 0.2
+    outcomes = load_together(BankHolidayStore(url=feed.url, cache_dir=str(tmp_path)))
+    assert feed.requests == [(None, 200)]
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+    assert outcomes[0] == json.loads(feed.payload)
+
+
+def test_concurrent_callers_share_one_error(feed, tmp_path):
+    feed.status, feed.delay = 500, 0.2
+    store = BankHolidayStore(url=feed.url, cache_dir=str(tmp_path), snapshot_path=str(tmp_path / "none.json"))
+    outcomes = load_together(store)
+    assert feed.requests == [(None, 500)]
+    assert isinstance(outcomes[0], BankHolidayError)
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+
+
+def test_cache_is_reused_within_the_ttl_then_revalidated(feed, tmp_path):
+    first = BankHolidayStore(url=feed.url, cache_dir=str(tmp_path))
+    first.load()
+    first.load()
+    # a new process reads the disk cache while it is fresh
+    BankHolidayStore(url=feed.url, cache_dir=str(tmp_path)).load()
+    assert feed.requests == [(None, 200)]
+
+    stale = BankHolidayStore(url=feed.url, cache_dir=str(tmp_path), ttl=0)
+    assert stale.load() == json.loads(feed.payload)
+    assert feed.requests == [(None, 200), ('"v1"', 304)]
+    assert stale.source == "network"
+
+
+def test_snapshot_is_used_when_the_feed_fails(feed, tmp_path):
+    feed.status = 500
+    store = BankHolidayStore(url=feed.url, cache_dir=str(tmp_path), ttl=0)
+    with open(SNAPSHOT, encoding="utf-8") as f:
+        assert store.load() == json.load(f)
+    assert store.source == "snapshot"
+    # no new request until the retry interval has passed
+    store.load()
+    assert feed.requests == [(None, 500)]
@@ -0,0 +1,20 @@
+from datetime import date
+from bench_batch import synthetic_rows
+from batch import calculate_batch
+from logic import compute_leave
+from run import compare
+
+
+def test_batch_matches_compute_leave(holidays):
+    rows = list(synthetic_rows(2000))
+    for row, result in zip(rows, calculate_batch(rows, holidays)):
+        expected = compute_leave(row["employee"], date.fromisoformat(row["start_date"]),
+                                 date.fromisoformat(row["end_date"]), date.fromisoformat(row["hire_date"]),
+                                 float(row["contracted_hours"]), row["region"], holidays)
+        assert result == expected
+
+
+def test_compare_flags_regressions():
+    baseline = {"fast": 100.0, "slow": 100.0}
+    failures = compare({"fast": 110.0, "slow": 130.0, "new": 5.0}, baseline, 0.2)
+    assert failures == ["slow"]
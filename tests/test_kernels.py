@@ -0,0 +1,17 @@
+import pytest
+from bench_kernels import check_identical, random_inputs, scalar, vector
+from calculations import long_service_blocks
+from kernels import calculate_long_service_array
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_vector_kernels_match_scalar(seed):
+    # Bit-identical, as benchmarks/bench_kernels.py checks at larger sizes
+    inputs = random_inputs(20_000, seed)
+    check_identical(scalar(inputs), vector(inputs))
+
+
+def test_long_service_blocks_are_never_negative():
+    assert long_service_blocks(-0.42) == 0
+    award, blocks = calculate_long_service_array([37.5], [-0.42], [365], [365])
+    assert blocks.tolist() == [0] and award.tolist() == [0.0]
@@ -0,0 +1,93 @@
+from datetime import date
+import pytest
+import logic
+from calculations import (calculate_entitlements, calculate_entitlements_timeline,
+                          calculate_long_service_timeline, hours_segments, hours_timeline)
+
+
+class FakeRoot:
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, callback):
+        self.callbacks.append(callback)
+
+    def run(self):
+        while self.callbacks:
+            self.callbacks.pop(0)()
+
+
+class FakeIndex:
+    def __init__(self, version, count):
+        self.version = version
+        self._count = count
+
+    def count(self, year, region):
+        return self._count
+
+
+def test_cache_is_cleared_when_bank_holidays_change(monkeypatch):
+    index = FakeIndex("v1", 8)
+    monkeypatch.setattr(logic, "get_bank_holiday_index", lambda: index)
+    root = FakeRoot()
+    shown = []
+    calculator = logic.BackgroundCalculator(root, lambda busy: None, shown.append, None)
+    inputs = dict(emp_number="E1", start_date=date(2026, 1, 1), end_date=date(2026, 12, 31),
+                  hire_date=date(2020, 1, 1), contracted_hours=37.5, region="England & Wales")
+
+    calculator.submit(inputs)
+    root.run()
+    calculator.submit(inputs)   # cached
+    assert [r.bank_holiday_count for r in shown] == [8, 8]
+
+    index = FakeIndex("v2", 9)
+    calculator.submit(dict(inputs, emp_number="E2"))
+    root.run()
+    calculator.submit(inputs)
+    root.run()
+    assert [r.bank_holiday_count for r in shown] == [8, 8, 9, 9]
+
+
+START, END = date(2025, 1, 1), date(2025, 12, 31)
+
+
+def test_hours_timeline_keeps_changes_inside_the_period():
+    changes = [(date(2026, 1, 1), 20.0), (date(2025, 7, 1), 22.5), (date(2024, 6, 1), 30.0)]
+    assert hours_timeline(START, END, 37.5, changes) == [(START, 30.0), (date(2025, 7, 1), 22.5)]
+    # a change on the first day replaces the starting hours
+    assert hours_timeline(START, END, 37.5, [(START, 16.0)]) == [(START, 16.0)]
+    assert hours_timeline(START, END, 37.5, [(END, 16.0)]) == [(START, 37.5), (END, 16.0)]
+
+
+def test_hours_segments_count_days():
+    timeline = [(START, 37.5), (date(2025, 7, 1), 22.5), (END, 16.0)]
+    assert hours_segments(timeline, START, END) == [(37.5, 181), (22.5, 183), (16.0, 1)]
+    with pytest.raises(ValueError):
+        hours_segments([(date(2025, 2, 1), 37.5)], START, END)
+
+
+def test_timeline_is_rounded_once():
+    # 37.5h for 181 days then 22.5h for 184: FTE (37.5*181 + 22.5*184) / 37.5 / 365 = 0.798356...
+    segments = [(37.5, 181), (22.5, 184)]
+    # 247.5 * FTE = 197.59, 187.5 * FTE = 149.69, 60 * FTE = 47.90 (8 bank holidays)
+    assert calculate_entitlements_timeline(segments, 365, 8) == (197.5, 149.75, 48.0)
+    # 2 blocks: 7.5 * 2 * FTE = 11.98
+    assert calculate_long_service_timeline(segments, 10.5, 365)[0] == 12.0
+
+
+def test_splitting_a_period_adds_no_rounding_drift():
+    # 30h all year, restated on the first of every month: rounding each month
+    # separately would give 197.5, the full year is 247.5 * 30 / 37.5 = 198
+    changes = [(date(2025, month, 1), 30.0) for month in range(2, 13)]
+    segments = hours_segments(hours_timeline(START, END, 30.0, changes), START, END)
+    assert len(segments) == 12
+    assert sum(calculate_entitlements(hours, days, 365, 8)[0] for hours, days in segments) == 197.5
+    assert calculate_entitlements_timeline(segments, 365, 8) == (198.0, 150.0, 48.0)
+    assert calculate_entitlements(30.0, 365, 365, 8) == (198.0, 150.0, 48.0)
+
+
+def test_compute_leave_with_hours_changes(holidays):
+    result = logic.compute_leave("E1", START, END, date(2014, 9, 1), 37.5, "England & Wales", holidays,
+                                 hours_changes=[(date(2025, 7, 1), 22.5)])
+    assert (result.prorated_entitlement, result.prorated_base, result.prorated_bh) == (197.5, 149.75, 48.0)
+    assert (result.long_service_blocks, result.long_service_award) == (2, 12.0)
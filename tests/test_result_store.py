@@ -0,0 +1,65 @@
+import json
+import pytest
+from bank_holidays import BankHolidayIndex, resource_path
+from batch import calculate_batch, calculate_incremental
+from result_store import ResultStore, decode_result, encode_result
+
+ROWS = [
+    {"employee": "E1", "hire_date": "2015-03-01", "leave_year": 2025, "contracted_hours": "37.5"},
+    {"employee": "E2", "hire_date": "2022-06-01", "leave_year": 2025, "contracted_hours": "22.5",
+     "region": "scotland"},
+    {"employee": "E3", "hire_date": "2024-01-15", "leave_year": 2025, "contracted_hours": "30"},
+]
+
+
+def run(rows, store, holidays, **kwargs):
+    return [(r.emp_number, changed) for r, changed in calculate_incremental(rows, store, holidays, **kwargs)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ResultStore(str(tmp_path / "results.db")) as store:
+        yield store
+
+
+def test_results_round_trip(holidays):
+    result = next(calculate_batch([dict(ROWS[0], hours_changes="2025-06-01=20")], holidays))
+    assert decode_result(encode_result(result)) == result
+
+
+def test_only_changed_rows_are_recalculated(store, holidays):
+    assert run(ROWS, store, holidays) == [("E1", True), ("E2", True), ("E3", True)]
+    assert run(ROWS, store, holidays) == [("E1", False), ("E2", False), ("E3", False)]
+    rows = [ROWS[0], dict(ROWS[1], contracted_hours="30"), ROWS[2]]
+    assert run(rows, store, holidays) == [("E1", False), ("E2", True), ("E3", False)]
+    assert run(rows, store, holidays, unchanged=False) == []
+
+
+def test_new_bank_holiday_data_recalculates_everything(store, holidays):
+    run(ROWS, store, holidays)
+    with open(resource_path("data", "bank-holidays.json"), encoding="utf-8") as f:
+        data = json.load(f)
+    data["scotland"]["events"].pop()
+    assert run(ROWS, store, BankHolidayIndex(data)) == [("E1", True), ("E2", True), ("E3", True)]
+
+
+def test_repeated_employee_year_is_rejected(store, holidays):
+    rejected = []
+    rows = ROWS + [dict(ROWS[0], contracted_hours="20")]
+    assert run(rows, store, holidays, rejected=rejected) == [("E1", True), ("E2", True), ("E3", True)]
+    assert rejected == [(5, "employee", "Duplicate of row 2 (same employee and leave year)")]
+
+
+def test_missing_employees_are_kept_unless_pruned(store, holidays):
+    run(ROWS, store, holidays)
+    missing = []
+    run(ROWS[:1], store, holidays, missing=missing)
+    assert missing == [("E2", 2025), ("E3", 2025)]
+    assert run(ROWS, store, holidays) == [("E1", False), ("E2", False), ("E3", False)]
+
+    # an employee with an invalid row is not missing, and other years are untouched
+    missing = []
+    rows = [ROWS[0], dict(ROWS[1], contracted_hours="99"), dict(ROWS[2], leave_year=2026)]
+    run(rows, store, holidays, rejected=[], missing=missing, prune=True)
+    assert missing == [("E3", 2025)]
+    assert sorted(store.lookup([("E2", 2025), ("E3", 2025), ("E3", 2026)])) == [("E2", 2025), ("E3", 2026)]
@@ -0,0 +1,18 @@
+import pytest
+from scenarios import parse_years, scenario_grid
+
+
+def test_years_before_hire_are_empty(holidays):
+    grid = scenario_grid(["A"], ["2026-06-01"], [37.5], [2024, 2025, 2026, 2031],
+                         ["england-and-wales"], holidays)
+    assert grid.leave_days.tolist() == [[0, 0, 214, 365]]
+    assert grid.blocks.tolist() == [[0, 0, 0, 1]]
+    assert grid.long_service.tolist() == [[0.0, 0.0, 0.0, 7.5]]
+    assert grid.basic[0, :2].tolist() == [[0.0], [0.0]]
+    assert grid.basic[0, 2, 0] > 0
+
+
+def test_parse_years_rejects_reversed_range():
+    assert parse_years("2026-2028, 2030") == [2026, 2027, 2028, 2030]
+    with pytest.raises(ValueError):
+        parse_years("2030-2026")
@@ -0,0 +1,34 @@
+import pytest
+from service import LeaveService, RequestError
+
+
+class FixedStore:
+    def __init__(self, index):
+        self._index = index
+
+    def index(self):
+        return self._index
+
+
+EMPLOYEE = {"employee": "E1", "hire_date": "2012-06-04", "leave_year": 2025, "contracted_hours": 30}
+
+
+def test_bulk_reports_non_scalar_fields_per_employee(holidays):
+    service = LeaveService(FixedStore(holidays))
+    body = service.calculate_bulk({"employees": [
+        dict(EMPLOYEE, contracted_hours=[1, 2]),
+        dict(EMPLOYEE, leave_year=2025.7),
+        dict(EMPLOYEE, region={"name": "scotland"}, hours_changes=[["2025-06-01", 20]]),
+        EMPLOYEE,
+    ]})
+    assert [result["index"] for result in body["results"]] == [3]
+    assert [(error["index"], error["field"]) for error in body["errors"]] == [
+        (0, "contracted_hours"), (1, "leave_year"), (2, "region"), (2, "hours_changes")]
+
+
+def test_calculate_rejects_non_scalar_fields(holidays):
+    service = LeaveService(FixedStore(holidays))
+    assert service.calculate(dict(EMPLOYEE, leave_year=2025.0))["leave_year"] == 2025
+    with pytest.raises(RequestError) as e:
+        service.calculate(dict(EMPLOYEE, contracted_hours=[1, 2]))
+    assert e.value.status == 400
@@ -0,0 +1,44 @@
+import dataclasses
+import pytest
+from bench_batch import synthetic_rows
+from batch import calculate_batch
+from snapshots import Snapshot, SnapshotDiff, SnapshotWriter
+
+
+def write_snapshot(path, results, holidays):
+    with SnapshotWriter(str(path), holidays, flush_rows=7) as writer:
+        for result in results:
+            writer.write(result)
+    return Snapshot(str(path))
+
+
+def test_snapshot_round_trip(tmp_path, holidays):
+    results = list(calculate_batch(list(synthetic_rows(50)), holidays))
+    # later blocks have longer str values than the first
+    results = [dataclasses.replace(r, emp_number=r.emp_number.lstrip("0E") or "0") for r in results]
+    snapshot = write_snapshot(tmp_path / "run", results, holidays)
+    assert list(snapshot) == results
+    assert snapshot["emp_number"].dtype == "<U2"
+    assert not list((tmp_path / "run").glob("*.part"))
+
+
+def test_diff_rejects_repeated_keys(tmp_path, holidays):
+    results = list(calculate_batch(list(synthetic_rows(3)), holidays))
+    old = write_snapshot(tmp_path / "old", results, holidays)
+    new = write_snapshot(tmp_path / "new", results + results[:1], holidays)
+    with pytest.raises(ValueError, match="more than one row"):
+        SnapshotDiff(old, new)
+
+
+def test_diff_keys_keep_employee_and_year_apart(tmp_path, holidays):
+    result = next(calculate_batch(list(synthetic_rows(1)), holidays))
+    old = write_snapshot(tmp_path / "old", [dataclasses.replace(result, emp_number="E1", leave_year=2025)], holidays)
+    new = write_snapshot(tmp_path / "new", [dataclasses.replace(result, emp_number="E12", leave_year=25)], holidays)
+    diff = SnapshotDiff(old, new)
+    assert (len(diff.old_rows), len(diff.removed), len(diff.added)) == (0, 1, 1)
+
+
+def test_long_periods_fit(tmp_path, holidays):
+    result = next(calculate_batch([{"employee": "A", "hire_date": "1890-01-01", "start_date": "1900-01-01",
+                                    "end_date": "2025-12-31"}], holidays))
+    assert list(write_snapshot(tmp_path / "run", [result], holidays)) == [result]
@@ -0,0 +1,33 @@
+from datetime import date
+import leave_calendar
+from validation import validate_rows
+
+
+def test_employee_number_zero_is_valid():
+    rows = [{"employee": 0, "hire_date": "2020-01-01", "leave_year": 2025},
+            {"employee": None, "hire_date": "2020-01-01", "leave_year": 2025}]
+    inputs, valid, errors = validate_rows(rows)
+    assert [row["emp_number"] for row in inputs] == ["0"]
+    assert valid.tolist() == [True, False]
+    assert errors == [(3, "employee", "Employee number is required.")]
+
+
+def test_periods_that_end_before_they_start_or_before_hire_are_rejected():
+    rows = [{"employee": "A", "hire_date": "2020-01-01", "start_date": "2025-12-31", "end_date": "2025-01-01"},
+            {"employee": "B", "hire_date": "2026-06-01", "leave_year": 2025},
+            {"employee": "C", "hire_date": "2025-12-31", "leave_year": 2025}]
+    inputs, valid, errors = validate_rows(rows)
+    assert valid.tolist() == [False, False, True]
+    assert errors == [(2, "end_date", "The leave period ends before it starts."),
+                      (3, "hire_date", "The hire date is after the end of the leave period.")]
+
+
+def test_the_year_9999_is_rejected():
+    rows = [{"employee": "A", "hire_date": "2020-01-01", "leave_year": 9999},
+            {"employee": "B", "hire_date": "2020-01-01", "start_date": "9999-01-01", "end_date": "9999-12-31"},
+            {"employee": "C", "hire_date": "2020-02-29", "leave_year": 9998}]
+    inputs, valid, errors = validate_rows(rows)
+    assert valid.tolist() == [False, False, True]
+    assert [(line, field) for line, field, _ in errors] == [(2, "leave_year"), (3, "start_date"), (3, "end_date")]
+    # the latest accepted period end still has a following anniversary
+    assert leave_calendar.service_years(inputs[0]["hire_date"], inputs[0]["end_date"]) > 7978
@@ -0,0 +1,240 @@
+from datetime import date, datetime
+import numpy as np
+from calculations import HOURS_ERROR, hours_timeline, parse_contracted_hours, region_slug
+
+# Column-at-a-time parsing of batch input. A chunk of rows is checked with
+# array operations, rejected rows are reported as (line, field, reason), and
+# the valid rows come out as calculation inputs that are not parsed again.
+
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d %b %Y")
+DEFAULT_HOURS = 37.5
+FIRST_DAY = np.datetime64("0001-01-01")
+# Service years look one anniversary past the period end, and a date can
+# not go past 9999, so that last year is not accepted
+LAST_YEAR = 9998
+LAST_DAY = np.datetime64(f"{LAST_YEAR}-12-31")
+
+
+def parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date: {value!r}")
+
+
+def parse_hours(value):
+    return parse_contracted_hours(str(value).strip())
+
+
+def parse_hours_changes(value):
+    # "2025-06-01=22.5; 2025-09-01=30" -> ((date(2025, 6, 1), 22.5), (date(2025, 9, 1), 30.0))
+    changes = []
+    for item in str(value or "").split(";"):
+        if not item.strip():
+            continue
+        effective, sep, hours = item.partition("=")
+        if not sep:
+            raise ValueError(f"Hours change {item.strip()!r} should look like YYYY-MM-DD=hours")
+        changes.append((parse_date(effective), parse_hours(hours)))
+    return tuple(sorted(changes))
+
+
+def employee_number(value):
+    # Excel gives numeric IDs as numbers, and 0 is a valid one
+    return "" if value is None else str(value).strip()
+
+
+def _blank(values):
+    return np.array([v is None or v == "" for v in values], dtype=bool)
+
+
+def parse_hours_column(values, default=DEFAULT_HOURS):
+    # -> (float array, {position: reason}); blanks take the default
+    values = [default if v is None or v == "" else v for v in values]
+    try:
+        hours = np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        hours = np.array([_float_or_nan(v) for v in values], dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        ok = (hours >= 0) & (hours <= 40) & (np.round(hours * 4) == hours * 4)
+    return hours, {i: HOURS_ERROR for i in np.flatnonzero(~ok)}
+
+
+def _float_or_nan(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def parse_date_column(values):
+    # -> (datetime64[D] array, {position: reason}). ISO and dd/mm/yyyy text is
+    # parsed by NumPy in one call; other formats and Excel date cells go
+    # through parse_date one at a time.
+    dates = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[D]")
+    positions, texts, others = [], [], []
+    for i, value in enumerate(values):
+        if isinstance(value, str):
+            text = value.strip()
+            if len(text) == 10 and text[4] == text[7] == "-":
+                positions.append(i)
+                texts.append(text)
+                continue
+            if len(text) == 10 and text[2] == text[5] and text[2] in "/-":
+                positions.append(i)
+                texts.append(f"{text[6:]}-{text[3:5]}-{text[:2]}")
+                continue
+        others.append(i)
+    if positions:
+        try:
+            dates[positions] = np.array(texts, dtype="datetime64[D]")
+        except ValueError:
+            # at least one impossible date in the chunk: find it the slow way
+            for i, text in zip(positions, texts):
+                try:
+                    dates[i] = date.fromisoformat(text)
+                except ValueError:
+                    others.append(i)
+    bad = {}
+    for i in others:
+        if values[i] is None or values[i] == "":
+            bad[i] = "A date is required."
+            continue
+        try:
+            dates[i] = parse_date(values[i])
+        except ValueError as e:
+            bad[i] = str(e)
+    for i in np.flatnonzero(dates > LAST_DAY):
+        bad.setdefault(i, f"Dates after {LAST_YEAR} are not supported: {values[i]!r}")
+    out_of_range = np.isnat(dates) | (dates < FIRST_DAY) | (dates > LAST_DAY)
+    for i in np.flatnonzero(out_of_range):
+        bad.setdefault(i, f"Unrecognised date: {values[i]!r}")
+    dates[out_of_range] = np.datetime64("NaT")
+    return dates, bad
+
+
+def parse_year_column(values):
+    # -> (int array, {position: reason})
+    try:
+        years = np.array(values, dtype=np.int64)
+    except (TypeError, ValueError, OverflowError):
+        years = np.array([_int_or_zero(v) for v in values], dtype=np.int64)
+    # int64 conversion would truncate 2025.7 to 2025
+    years[[i for i, v in enumerate(values) if isinstance(v, float) and not v.is_integer()]] = 0
+    bad = {i: f"Unrecognised leave year: {values[i]!r}"
+           for i in np.flatnonzero((years < 1) | (years > LAST_YEAR))}
+    return years, bad
+
+
+def _int_or_zero(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+def validate_rows(rows, first_line=2):
+    # Returns (inputs for the valid rows, boolean mask of valid rows, errors
+    # as (line, field, reason)); a row with several bad fields is reported
+    # once per field.
+    count = len(rows)
+    problems = {}
+
+    def reject(field, bad):
+        for i, reason in bad.items():
+            problems.setdefault(int(i), []).append((field, reason))
+
+    def column(field):
+        return [row.get(field) for row in rows]
+
+    employees = [employee_number(row.get("employee")) for row in rows]
+    reject("employee", {i: "Employee number is required." for i, e in enumerate(employees) if not e})
+
+    hours, bad = parse_hours_column(column("contracted_hours"))
+    reject("contracted_hours", bad)
+    hire, bad = parse_date_column(column("hire_date"))
+    reject("hire_date", bad)
+
+    values = column("start_date")
+    has_start = ~_blank(values)
+    start = np.full(count, np.datetime64("NaT"), dtype="datetime64[D]")
+    if has_start.any():
+        parsed, bad = parse_date_column(values)
+        start[has_start] = parsed[has_start]
+        reject("start_date", {i: r for i, r in bad.items() if has_start[i]})
+    if not has_start.all():
+        positions = np.flatnonzero(~has_start)
+        values = column("leave_year")
+        has_year = ~_blank([values[i] for i in positions])
+        reject("start_date", {i: "A leave period start_date or leave_year is required."
+                              for i in positions[~has_year]})
+        positions = positions[has_year]
+        years, bad = parse_year_column([values[i] for i in positions])
+        reject("leave_year", {positions[i]: r for i, r in bad.items()})
+        ok = np.ones(len(positions), dtype=bool)
+        ok[list(bad)] = False
+        start[positions[ok]] = (years[ok] - 1970).astype("datetime64[Y]")
+
+    values = column("end_date")
+    has_end = ~_blank(values)
+    # default: 31 December of the start year
+    end = ((start.astype("datetime64[Y]") + 1).astype("datetime64[D]") - 1)
+    if has_end.any():
+        parsed, bad = parse_date_column(values)
+        end[has_end] = parsed[has_end]
+        reject("end_date", {i: r for i, r in bad.items() if has_end[i]})
+    # NaT (already rejected) compares false, so each row is reported once
+    reject("end_date", {i: "The leave period ends before it starts."
+                        for i in np.flatnonzero(end < start)})
+    reject("hire_date", {i: "The hire date is after the end of the leave period."
+                         for i in np.flatnonzero(hire > end)})
+
+    slugs = {}
+    regions = []
+    for i, row in enumerate(rows):
+        name = str(row.get("region") or "").strip()
+        if name not in slugs:
+            try:
+                slugs[name] = region_slug(name)
+            except ValueError as e:
+                slugs[name] = e
+        slug = slugs[name]
+        if isinstance(slug, ValueError):
+            reject("region", {i: str(slug)})
+        regions.append(slug)
+
+    hire_dates, start_dates, end_dates = hire.tolist(), start.tolist(), end.tolist()
+    hours = hours.tolist()
+    changes = [()] * count
+    for i, row in enumerate(rows):
+        value = row.get("hours_changes")
+        if value in (None, "") or i in problems:
+            continue
+        try:
+            timeline = hours_timeline(start_dates[i], end_dates[i], hours[i], parse_hours_changes(value))
+        except (TypeError, ValueError) as e:
+            reject("hours_changes", {i: str(e)})
+            continue
+        hours[i], changes[i] = timeline[0][1], tuple(timeline[1:])
+
+    valid = np.ones(count, dtype=bool)
+    valid[list(problems)] = False
+    inputs = [{
+        "emp_number": employees[i],
+        "start_date": start_dates[i],
+        "end_date": end_dates[i],
+        "hire_date": hire_dates[i],
+        "contracted_hours": hours[i],
+        "region": regions[i],
+        "hours_changes": changes[i],
+    } for i in np.flatnonzero(valid)]
+    errors = [(first_line + i, field, reason)
+              for i in sorted(problems) for field, reason in problems[i]]
+    return inputs, valid, errors
@@ -0,0 +1,497 @@
+import csv
+import json
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import instrumentation
+from formatting import OPTIMA_COLUMNS, RESULT_COLUMNS, optima_values, pdf_lines, result_to_dict, result_values
+
+# Rows are buffered and handed to the csv module / Arrow in blocks, so the
+# per-row cost is building one tuple and the writes themselves are batched.
+FLUSH_ROWS = 10000
+FILE_BUFFER = 1024 * 1024
+
+# Fixed columnar schema for Parquet/Arrow output
+COLUMNAR_FIELDS = [
+    ("employee", "string"),
+    ("region", "string"),
+    ("year", "int16"),
+    ("base_hours", "float64"),
+    ("bank_holiday_hours", "float64"),
+    ("long_service_hours", "float64"),
+    ("total_hours", "float64"),
+]
+
+FORMATS = {".csv": "csv", ".json": "json", ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+
+class CsvResultWriter:
+    def __init__(self, file, flush_rows=FLUSH_ROWS, columns=RESULT_COLUMNS, values=result_values):
+        self._file = file
+        self._owns_file = isinstance(file, (str, os.PathLike))
+        if self._owns_file:
+            self._file = open(file, "w", newline="", encoding="utf-8", buffering=FILE_BUFFER)
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+        self._values = values
+        self._buffer = []
+        self.flush_rows = flush_rows
+        self.count = 0
+
+    def write(self, result):
+        self._buffer.append(self._values(result))
+        if len(self._buffer) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        with instrumentation.span("export.csv"):
+            self._writer.writerows(self._buffer)
+        self.count += len(self._buffer)
+        self._buffer.clear()
+
+    def close(self):
+        self.flush()
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonResultWriter:
+    # A JSON array of formatting.result_to_dict objects, one per line,
+    # streamed out a block at a time like the CSV writer
+    def __init__(self, file, flush_rows=FLUSH_ROWS):
+        self._file = file
+        self._owns_file = isinstance(file, (str, os.PathLike))
+        if self._owns_file:
+            self._file = open(file, "w", encoding="utf-8", buffering=FILE_BUFFER)
+        self._file.write("[")
+        self._buffer = []
+        self.flush_rows = flush_rows
+        self.count = 0
+
+    def write(self, result):
+        self._buffer.append(result)
+        if len(self._buffer) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        with instrumentation.span("export.json"):
+            separator = ",\n" if self.count else "\n"
+            self._file.write(separator + ",\n".join(json.dumps(result_to_dict(r)) for r in self._buffer))
+        self.count += len(self._buffer)
+        self._buffer.clear()
+
+    def close(self):
+        self.flush()
+        self._file.write("\n]\n")
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ColumnarResultWriter:
+    # Parquet (one row group per flush) or Arrow IPC (one record batch per flush)
+    def __init__(self, path, format="parquet", flush_rows=FLUSH_ROWS):
+        import pyarrow as pa  # optional: only needed for columnar output
+
+        self._pa = pa
+        self.schema = pa.schema([(name, getattr(pa, kind)()) for name, kind in COLUMNAR_FIELDS])
+        if format == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self._writer = pa.ipc.new_file(path, self.schema)
+        self.format = format
+        self.flush_rows = flush_rows
+        self.count = 0
+        self._columns = [[] for _ in COLUMNAR_FIELDS]
+
+    def write(self, result):
+        employee, region, year, base, bh, long_service, total = self._columns
+        employee.append(result.emp_number)
+        region.append(result.region)
+        year.append(result.leave_year)
+        base.append(result.prorated_base)
+        bh.append(result.prorated_bh)
+        long_service.append(result.long_service_award)
+        total.append(result.total_entitlement)
+        if len(employee) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._columns[0]:
+            return
+        with instrumentation.span(f"export.{self.format}"):
+            batch = self._pa.record_batch(self._columns, schema=self.schema)
+            self._writer.write_batch(batch)
+        self.count += batch.num_rows
+        self._columns = [[] for _ in COLUMNAR_FIELDS]
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Scenario grids (scenarios.ScenarioGrid) in long format, one row per
+# (employee, year, region) cell
+GRID_FIELDS = [
+    ("employee", "string"),
+    ("year", "int16"),
+    ("region", "string"),
+    ("contracted_hours", "float64"),
+    ("bank_holidays", "int16"),
+    ("leave_days", "int16"),
+    ("base_hours", "float64"),
+    ("bank_holiday_hours", "float64"),
+    ("basic_hours", "float64"),
+    ("long_service_hours", "float64"),
+    ("total_hours", "float64"),
+]
+GRID_HOURS = {"base_hours", "bank_holiday_hours", "basic_hours", "long_service_hours", "total_hours"}
+
+
+def _format_hours(values):
+    # Hours are rounded to quarter hours, so a grid holds few distinct values:
+    # format each once and index the labels
+    distinct, positions = np.unique(values, return_inverse=True)
+    return np.array([f"{value:.2f}" for value in distinct.tolist()], dtype=object)[positions]
+
+
+class GridWriter:
+    # Each grid is written as a whole: one CSV block, Parquet row group or
+    # Arrow record batch built straight from its column arrays.
+    def __init__(self, path, format=None):
+        self.format = output_format(path, format)
+        self.count = 0
+        if self.format == "csv":
+            self._file = open(path, "w", newline="", encoding="utf-8", buffering=FILE_BUFFER)
+            self._writer = csv.writer(self._file)
+            self._writer.writerow([name for name, _ in GRID_FIELDS])
+        elif self.format in ("parquet", "arrow"):
+            import pyarrow as pa  # optional: only needed for columnar output
+
+            self._pa = pa
+            self.schema = pa.schema([(name, getattr(pa, kind)()) for name, kind in GRID_FIELDS])
+            if self.format == "parquet":
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(path, self.schema)
+            else:
+                self._writer = pa.ipc.new_file(path, self.schema)
+        else:
+            raise ValueError(f"Unknown output format: {self.format}")
+
+    def write(self, grid):
+        columns = grid.columns()
+        with instrumentation.span(f"export.{self.format}"):
+            if self.format == "csv":
+                for name in GRID_HOURS:
+                    columns[name] = _format_hours(columns[name])
+                self._writer.writerows(zip(*(columns[name].tolist() for name, _ in GRID_FIELDS)))
+            else:
+                arrays = [self._pa.array(columns[name], type=self.schema.field(name).type)
+                          for name, _ in GRID_FIELDS]
+                self._writer.write_batch(self._pa.record_batch(arrays, schema=self.schema))
+        self.count += len(columns["employee"])
+
+    def close(self):
+        if self.format == "csv":
+            self._file.close()
+        else:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_optima_writer(path, flush_rows=FLUSH_ROWS):
+    # Just the OPTIMA UPLOAD fields, e.g. for a delta of changed employees
+    return CsvResultWriter(path, flush_rows, OPTIMA_COLUMNS, optima_values)
+
+
+def output_format(path, format=None):
+    if format:
+        return format
+    return FORMATS.get(os.path.splitext(str(path))[1].lower(), "csv")
+
+
+def open_writer(path, format=None, flush_rows=FLUSH_ROWS):
+    format = output_format(path, format)
+    if format == "csv":
+        return CsvResultWriter(path, flush_rows)
+    if format == "json":
+        return JsonResultWriter(path, flush_rows)
+    if format in ("parquet", "arrow"):
+        return ColumnarResultWriter(path, format, flush_rows)
+    raise ValueError(f"Unknown output format: {format}")
+
+
+def write_results(results, path, format=None, flush_rows=FLUSH_ROWS):
+    with open_writer(path, format, flush_rows) as writer:
+        for result in results:
+            writer.write(result)
+    return writer.count
+
+
+# Bulk PDF statements: one page per employee in a single document, with the
+# font set up once. Line height is chosen so a summary fits on one A4 page.
+PDF_LINE_HEIGHT = 6
+PDF_TOC_LINE_HEIGHT = 6
+SHARD_SIZE = 500
+
+
+class PdfStatementWriter:
+    def __init__(self, path, toc=False):
+        from fpdf import FPDF  # deferred: fpdf is only needed for PDF output
+
+        self.path = path
+        self.toc = toc
+        self.count = 0
+        self._contents = []
+        self._pdf = FPDF()
+        self._pdf.set_auto_page_break(auto=True, margin=15)
+        self._pdf.set_font("Helvetica", size=10)
+
+    def write(self, result):
+        with instrumentation.span("export.pdf"):
+            pdf = self._pdf
+            pdf.add_page()
+            if self.toc:
+                self._contents.append((result.emp_number, pdf.page_no()))
+            for line in pdf_lines(result):
+                pdf.cell(0, PDF_LINE_HEIGHT, txt=line, ln=True)
+        self.count += 1
+
+    def _write_contents(self):
+        # Statements are streamed, so the contents pages go at the end
+        pdf = self._pdf
+        pdf.add_page()
+        pdf.set_font("Helvetica", style="B", size=12)
+        pdf.cell(0, 10, txt="Contents", ln=True)
+        pdf.set_font("Helvetica", size=10)
+        for employee, page in self._contents:
+            pdf.cell(150, PDF_TOC_LINE_HEIGHT, txt=f"Employee {employee}")
+            pdf.cell(0, PDF_TOC_LINE_HEIGHT, txt=str(page), ln=True, align="R")
+
+    def close(self):
+        with instrumentation.span("export.pdf"):
+            if self.toc and self._contents:
+                self._write_contents()
+            self._pdf.output(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_pdf_shard(results, path, toc=False):
+    with PdfStatementWriter(path, toc) as writer:
+        for result in results:
+            writer.write(result)
+    return path
+
+
+class ShardedPdfWriter:
+    # Splits statements into numbered documents of shard_size employees.
+    # With workers > 1 each shard is rendered in a separate process; at most
+    # two shards per worker are held in memory at once.
+    def __init__(self, directory, shard_size=SHARD_SIZE, workers=1, toc=False):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.shard_size = shard_size
+        self.workers = workers or os.cpu_count() or 1
+        self.toc = toc
+        self.paths = []
+        self.count = 0
+        self._buffer = []
+        self._pending = deque()
+        self._executor = None
+        if self.workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def write(self, result):
+        self._buffer.append(result)
+        if len(self._buffer) >= self.shard_size:
+            self._submit()
+
+    def _submit(self):
+        if not self._buffer:
+            return
+        path = os.path.join(self.directory, f"statements-{len(self.paths) + 1:04d}.pdf")
+        self.paths.append(path)
+        self.count += len(self._buffer)
+        shard, self._buffer = self._buffer, []
+        if self._executor is None:
+            write_pdf_shard(shard, path, self.toc)
+            return
+        self._pending.append(self._executor.submit(write_pdf_shard, shard, path, self.toc))
+        while len(self._pending) >= self.workers * 2:
+            self._pending.popleft().result()
+
+    def close(self):
+        self._submit()
+        while self._pending:
+            self._pending.popleft().result()
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Writers that run alongside the calculation: one run feeding several
+# outputs at once
+QUEUE_DEPTH = 8      # blocks waiting per writer; caps memory at about QUEUE_DEPTH * BLOCK_ROWS results
+BLOCK_ROWS = 1000
+
+
+def _render_pdf(blocks, path, toc):
+    # Runs in its own process: blocks of results until None
+    with PdfStatementWriter(path, toc) as writer:
+        for block in iter(blocks.get, None):
+            for result in block:
+                writer.write(result)
+
+
+class PdfProcessWriter:
+    # One statement document, laid out in a separate process so page
+    # rendering does not compete with the calculation for the GIL. Results
+    # are sent in blocks through a bounded queue.
+    def __init__(self, path, toc=False, depth=QUEUE_DEPTH, block_rows=BLOCK_ROWS):
+        import multiprocessing
+
+        self.path = path
+        self.block_rows = block_rows
+        self.count = 0
+        self._buffer = []
+        self._blocks = multiprocessing.Queue(depth)
+        self._process = multiprocessing.Process(target=_render_pdf, args=(self._blocks, path, toc), daemon=True)
+        self._process.start()
+
+    def write(self, result):
+        self._buffer.append(result)
+        if len(self._buffer) >= self.block_rows:
+            self._send(self._buffer)
+            self.count += len(self._buffer)
+            self._buffer = []
+
+    def _send(self, block):
+        # A renderer that died would never empty the queue
+        while True:
+            try:
+                self._blocks.put(block, timeout=1)
+                return
+            except queue.Full:
+                if not self._process.is_alive():
+                    raise RuntimeError(f"PDF renderer for {self.path} stopped (exit code {self._process.exitcode})")
+
+    def close(self):
+        if self._buffer:
+            self._send(self._buffer)
+            self.count += len(self._buffer)
+            self._buffer = []
+        self._send(None)
+        with instrumentation.span("export.pdf"):
+            self._process.join()
+        if self._process.exitcode:
+            raise RuntimeError(f"PDF renderer for {self.path} failed (exit code {self._process.exitcode})")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FanOutWriter:
+    # Passes every result to several writers, each draining its own bounded
+    # queue on its own thread. A slow writer only holds up the run once its
+    # queue is full, so the export takes about as long as the slowest writer
+    # rather than the sum of them. The writers themselves are closed by
+    # their owner after close().
+    def __init__(self, writers, depth=QUEUE_DEPTH, block_rows=BLOCK_ROWS):
+        self.writers = writers
+        self.block_rows = block_rows
+        self.count = 0
+        self._buffer = []
+        self._errors = []
+        self._queues = [queue.Queue(depth) for _ in writers]
+        self._threads = [threading.Thread(target=self._drain, args=(writer, blocks), daemon=True)
+                         for writer, blocks in zip(writers, self._queues)]
+        for thread in self._threads:
+            thread.start()
+
+    def _drain(self, writer, blocks):
+        try:
+            for block in iter(blocks.get, None):
+                for result in block:
+                    writer.write(result)
+        except Exception as e:
+            self._errors.append(e)
+            for _ in iter(blocks.get, None):
+                pass  # keep emptying the queue so write() never blocks on it
+
+    def write(self, result):
+        self._buffer.append(result)
+        if len(self._buffer) >= self.block_rows:
+            self._send()
+
+    def _send(self):
+        if self._errors:
+            raise self._errors[0]
+        if not self._buffer:
+            return
+        block, self._buffer = self._buffer, []
+        with instrumentation.span("export.wait"):
+            for blocks in self._queues:
+                blocks.put(block)   # shared: writers only read the results
+        self.count += len(block)
+
+    def close(self):
+        try:
+            self._send()
+        finally:
+            for blocks in self._queues:
+                blocks.put(None)
+            for thread in self._threads:
+                thread.join()
+        if self._errors:
+            raise self._errors[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()